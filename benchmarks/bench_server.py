@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the Byonoy MCP server.
+
+Drives the real FastMCP server from ``byonoy_luminescence_reader.server``
+against the simulated reader backend and reports:
+
+- p50/p95/p99 latency of each tool, in process and over stdio,
+- plates per hour for ``measure``,
+- cold start: time from spawning the server to the MCP handshake, the first
+  tool call and the first finished measurement, with an explicit
+  ``connect_device`` and with ``--auto-connect``.
+
+Results are written as JSON. Pass ``--baseline`` with an earlier result file to
+print the change per tool.
+
+Usage:
+    python benchmarks/bench_server.py --output bench_results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Report label, read-only tool and the arguments it is called with
+LATENCY_TOOLS = [
+    ("get_library_version", "get_library_version", {}),
+    ("list_devices", "list_devices", {}),
+    ("get_device_info", "get_device_info", {}),
+    ("get_device_status", "get_device_status", {}),
+    ("get_device_temperature", "get_device_temperature", {}),
+    ("get_device_snapshot", "get_device_snapshot", {"max_age_seconds": 0}),
+    ("get_device_snapshot_cached", "get_device_snapshot", {}),
+    ("get_environment_history", "get_environment_history", {"max_points": 50}),
+]
+
+
+def simulator_env(args: argparse.Namespace, store_dir: str) -> Dict[str, str]:
+    return {
+        "BYONOY_MCP_BACKEND": "simulator",
+        "BYONOY_SIM_DEVICES": str(args.devices),
+        "BYONOY_SIM_TIME_SCALE": str(args.time_scale),
+        "BYONOY_SIM_SEED": "1",
+        "BYONOY_MCP_STORE_DIR": store_dir,
+        "BYONOY_MCP_SAMPLE_INTERVAL": "0",
+    }
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000 * sum(ordered) / len(ordered),
+        "p50_ms": 1000 * pick(0.50),
+        "p95_ms": 1000 * pick(0.95),
+        "p99_ms": 1000 * pick(0.99),
+        "max_ms": 1000 * ordered[-1],
+    }
+
+
+def payload(result: Any) -> Any:
+    """Decodes the JSON text content of a tool result."""
+    text = result.content[0].text if result.content else ""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+async def time_call(call: Callable[[], Awaitable[Any]]) -> float:
+    start = time.perf_counter()
+    await call()
+    return time.perf_counter() - start
+
+
+async def bench_session(session: Any, args: argparse.Namespace) -> Dict[str, Any]:
+    """Runs the latency and throughput benchmarks on a connected session."""
+    await session.call_tool("connect_device", {})
+    latency: Dict[str, Any] = {}
+    for name, tool, arguments in LATENCY_TOOLS:
+        for _ in range(args.warmup):
+            await session.call_tool(tool, arguments)
+        samples = [
+            await time_call(lambda: session.call_tool(tool, arguments))
+            for _ in range(args.iterations)
+        ]
+        latency[name] = percentiles(samples)
+
+    # measure submission alone, then full plates through measure_batch
+    submit = []
+    for _ in range(args.iterations):
+        start = time.perf_counter()
+        job = payload(await session.call_tool("measure", {"mode": "FAST"}))
+        submit.append(time.perf_counter() - start)
+        await session.call_tool("wait_measurement_job", {"job_id": job["job_id"]})
+    latency["measure"] = percentiles(submit)
+
+    throughput = {}
+    for mode in ("FAST", "SENSITIVE"):
+        start = time.perf_counter()
+        batch = payload(await session.call_tool("measure_batch", {"plates": args.plates, "mode": mode}))
+        for job in batch["jobs"]:
+            await session.call_tool("wait_measurement_job", {"job_id": job["job_id"], "timeout_seconds": 3600})
+        elapsed = time.perf_counter() - start
+        plates_per_hour = args.plates / elapsed * 3600
+        throughput[mode] = {
+            "plates": args.plates,
+            "seconds": elapsed,
+            "plates_per_hour": plates_per_hour,
+            # Simulated delays are scaled, so this estimates real-time throughput.
+            "plates_per_hour_unscaled": plates_per_hour * args.time_scale if args.time_scale else None,
+        }
+    await session.call_tool("disconnect_device", {})
+    return {"latency": latency, "throughput": throughput}
+
+
+async def bench_in_process(args: argparse.Namespace) -> Dict[str, Any]:
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    from byonoy_luminescence_reader.server import mcp
+
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        return await bench_session(session, args)
+
+
+def stdio_parameters(env: Dict[str, str], extra_args: Optional[List[str]] = None) -> Any:
+    from mcp.client.stdio import StdioServerParameters
+
+    server_env = dict(os.environ)
+    server_env.update(env)
+    server_env["PYTHONPATH"] = os.pathsep.join(filter(None, [ROOT, server_env.get("PYTHONPATH")]))
+    return StdioServerParameters(
+        command=sys.executable,
+        args=["-m", "byonoy_luminescence_reader.server", *(extra_args or [])],
+        env=server_env,
+    )
+
+
+async def bench_stdio(args: argparse.Namespace, env: Dict[str, str]) -> Dict[str, Any]:
+    from mcp import ClientSession
+    from mcp.client.stdio import stdio_client
+
+    async with stdio_client(stdio_parameters(env)) as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            return await bench_session(session, args)
+
+
+async def bench_cold_start(
+    args: argparse.Namespace, env: Dict[str, str], auto_connect: bool = False
+) -> Dict[str, Any]:
+    from mcp import ClientSession
+    from mcp.client.stdio import stdio_client
+
+    runs = []
+    for _ in range(args.cold_starts):
+        start = time.perf_counter()
+        parameters = stdio_parameters(env, ["--auto-connect"] if auto_connect else None)
+        async with stdio_client(parameters) as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                initialized = time.perf_counter()
+                await session.call_tool("get_library_version", {})
+                first_call = time.perf_counter()
+                if not auto_connect:
+                    await session.call_tool("connect_device", {})
+                job = payload(await session.call_tool("measure", {"mode": "FAST"}))
+                await session.call_tool("wait_measurement_job", {"job_id": job["job_id"]})
+                first_measurement = time.perf_counter()
+        runs.append(
+            {
+                "initialize_seconds": initialized - start,
+                "first_call_seconds": first_call - start,
+                "first_measurement_seconds": first_measurement - start,
+            }
+        )
+    return {key: min(run[key] for run in runs) for key in runs[0]} | {"runs": runs}
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    """Prints the p50/p95 change of every tool against a baseline result."""
+    for transport, current in results["transports"].items():
+        previous = baseline.get("transports", {}).get(transport)
+        if previous is None:
+            continue
+        print(f"\n{transport}: change against baseline")
+        for tool, stats in current["latency"].items():
+            old = previous["latency"].get(tool)
+            if old is None:
+                continue
+            print(
+                f"  {tool:32s} p50 {stats['p50_ms'] / old['p50_ms'] - 1:+7.1%}"
+                f"  p95 {stats['p95_ms'] / old['p95_ms'] - 1:+7.1%}"
+            )
+
+
+def report(results: Dict[str, Any]) -> None:
+    for transport, data in results["transports"].items():
+        print(f"\n{transport}")
+        for tool, stats in data["latency"].items():
+            print(
+                f"  {tool:32s} p50 {stats['p50_ms']:8.2f} ms  p95 {stats['p95_ms']:8.2f} ms"
+                f"  p99 {stats['p99_ms']:8.2f} ms"
+            )
+        for mode, stats in data["throughput"].items():
+            print(f"  measure {mode:9s} {stats['plates_per_hour']:10.0f} plates/h")
+    for key, label in (("cold_start", "cold start"), ("cold_start_auto_connect", "cold start, --auto-connect")):
+        if key not in results:
+            continue
+        cold = results[key]
+        print(
+            f"\n{label}: initialize {cold['initialize_seconds']:.3f} s,"
+            f" first call {cold['first_call_seconds']:.3f} s,"
+            f" first measurement {cold['first_measurement_seconds']:.3f} s"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--iterations", type=int, default=200, help="calls per tool")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed calls per tool")
+    parser.add_argument("--plates", type=int, default=20, help="plates per throughput run")
+    parser.add_argument("--devices", type=int, default=2, help="simulated readers")
+    parser.add_argument("--time-scale", type=float, default=0.01, help="simulator time scale")
+    parser.add_argument("--cold-starts", type=int, default=3, help="cold start repetitions")
+    parser.add_argument(
+        "--transports", default="in-process,stdio", help="comma separated: in-process, stdio"
+    )
+    parser.add_argument("--output", default="bench_results.json", help="result JSON file")
+    parser.add_argument("--baseline", help="earlier result JSON to compare against")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    store_dir = tempfile.mkdtemp(prefix="byonoy-bench-")
+    env = simulator_env(args, store_dir)
+    # The in-process server reads its configuration at import time.
+    os.environ.update(env)
+
+    from byonoy_luminescence_reader import __version__
+
+    results: Dict[str, Any] = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "baseline")},
+        "transports": {},
+    }
+    transports = [t.strip() for t in args.transports.split(",") if t.strip()]
+    if "in-process" in transports:
+        results["transports"]["in-process"] = asyncio.run(bench_in_process(args))
+    if "stdio" in transports:
+        results["transports"]["stdio"] = asyncio.run(bench_stdio(args, env))
+        if args.cold_starts > 0:
+            results["cold_start"] = asyncio.run(bench_cold_start(args, env))
+            results["cold_start_auto_connect"] = asyncio.run(bench_cold_start(args, env, auto_connect=True))
+
+    report(results)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
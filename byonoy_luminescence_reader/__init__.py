@@ -8,6 +8,14 @@ __version__ = "0.1.0"
 __author__ = "Luis Villa"
 __email__ = "luis.villa@example.com"
 
-from .server import mcp
+__all__ = ["mcp", "main"]
 
-__all__ = ["mcp"] 
\ No newline at end of file
+
+def __getattr__(name):
+    # The server pulls in the MCP framework and builds every tool, so it is only
+    # imported when first used, not when reading e.g. __version__.
+    if name in __all__:
+        from . import server
+
+        return getattr(server, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}") 
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Plate analytics.
+
+Every function works on a ``(plates, 96)`` float array, so a batch of
+hundreds of plates costs a handful of vectorized NumPy operations instead of
+a loop per plate. Well groups (blanks, controls, replicates) are index
+arrays as returned by ``wells``.
+
+Statistics use the sample standard deviation (``ddof=1``). Values that are
+undefined, like the CV of a group with a zero mean, are NaN and reported as
+None by ``summarize`` and ``to_float``.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .plate import WELLS, well_name
+
+
+def as_plates(rows: List[List[float]], *stored: np.ndarray) -> np.ndarray:
+    """Stacks plate value lists and already loaded plate arrays into one array."""
+    return np.vstack([np.asarray(rows, dtype=np.float64).reshape(-1, WELLS), *stored])
+
+
+def wells(selected_wells: List[bool]) -> np.ndarray:
+    """Indices of the selected wells."""
+    return np.flatnonzero(np.asarray(selected_wells, dtype=bool))
+
+
+def well_names(indices: np.ndarray) -> List[str]:
+    return [well_name(int(i)) for i in indices]
+
+
+def other_wells(indices: np.ndarray, *groups: np.ndarray) -> np.ndarray:
+    """The ``indices`` that are in none of the groups."""
+    return np.setdiff1d(indices, np.concatenate(groups))
+
+
+def subtract_blank(plates: np.ndarray, blank: np.ndarray) -> np.ndarray:
+    """Subtracts the mean of the blank wells of each plate from all of its wells."""
+    return plates - plates[:, blank].mean(axis=1, keepdims=True)
+
+
+def group_stats(plates: np.ndarray, group: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Mean and standard deviation of a well group on each plate."""
+    values = plates[:, group]
+    if len(group) < 2:
+        return values.mean(axis=1), np.full(len(plates), np.nan)
+    return values.mean(axis=1), values.std(axis=1, ddof=1)
+
+
+def cv_percent(mean: np.ndarray, sd: np.ndarray) -> np.ndarray:
+    """Coefficient of variation in percent."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(mean != 0, 100.0 * sd / np.abs(mean), np.nan)
+
+
+def z_prime(
+    positive_mean: np.ndarray, positive_sd: np.ndarray, negative_mean: np.ndarray, negative_sd: np.ndarray
+) -> np.ndarray:
+    """Z'-factor of each plate: 1 - 3 (sd+ + sd-) / |mean+ - mean-|."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 1.0 - 3.0 * (positive_sd + negative_sd) / np.abs(positive_mean - negative_mean)
+
+
+def at_least(values: np.ndarray, minimum: float) -> np.ndarray:
+    """Whether each value is finite and at least ``minimum``."""
+    return np.isfinite(values) & (values >= minimum)
+
+
+def signal_to_background(positive_mean: np.ndarray, negative_mean: np.ndarray) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(negative_mean != 0, positive_mean / negative_mean, np.nan)
+
+
+def normalize(plates: np.ndarray, positive_mean: np.ndarray, negative_mean: np.ndarray) -> np.ndarray:
+    """Percent of control: 0 at the negative and 100 at the positive control mean."""
+    span = (positive_mean - negative_mean)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(span != 0, 100.0 * (plates - negative_mean[:, None]) / span, np.nan)
+
+
+def to_float(value: Any) -> Optional[float]:
+    value = float(value)
+    return None if not np.isfinite(value) else round(value, 4)
+
+
+def summarize(values: np.ndarray) -> Dict[str, Optional[float]]:
+    """Mean, median, min and max of the finite values."""
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return {"mean": None, "median": None, "min": None, "max": None}
+    return {
+        "mean": to_float(finite.mean()),
+        "median": to_float(np.median(finite)),
+        "min": to_float(finite.min()),
+        "max": to_float(finite.max()),
+    }
@@ -0,0 +1,97 @@
+"""
+Reader SDK backends.
+
+The server never imports ``byonoy_devices`` directly. It talks to readers
+through ``sdk``, a proxy that forwards every attribute to the selected backend:
+
+- ``byonoy``: the real ``byonoy_devices`` SDK (default).
+- ``simulator``: an in-process simulated reader, see ``simulator.py``.
+
+A backend exposes the same functions, enums and config classes as
+``byonoy_devices``. It is chosen with ``--backend`` or the
+``BYONOY_MCP_BACKEND`` environment variable and is loaded on first use.
+
+Every SDK function fetched through the proxy is timed by ``metrics``.
+"""
+
+import inspect
+import os
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import instrument_sdk_call
+
+BACKENDS = ("byonoy", "simulator")
+
+
+def load_backend(name: str) -> Any:
+    """Imports and returns the backend called ``name``."""
+    if name == "byonoy":
+        import byonoy_devices
+
+        return byonoy_devices
+    if name == "simulator":
+        from .simulator import SimulatedBackend
+
+        return SimulatedBackend.from_env()
+    raise ValueError(f"Unknown backend '{name}'. Use one of: {', '.join(BACKENDS)}.")
+
+
+class BackendProxy:
+    """
+    Forwards attribute access to the selected backend, loading it lazily.
+    Functions are returned wrapped with latency instrumentation.
+    """
+
+    def __init__(self):
+        self._backend: Optional[Any] = None
+        self._name: Optional[str] = None
+        self._lock = threading.Lock()
+        self._functions: Dict[str, Callable] = {}
+
+    @property
+    def name(self) -> str:
+        return self._name or os.environ.get("BYONOY_MCP_BACKEND", "byonoy")
+
+    @property
+    def loaded(self) -> bool:
+        return self._backend is not None
+
+    def use(self, name: str) -> None:
+        """Selects a backend. Must be called before the SDK is first used."""
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown backend '{name}'. Use one of: {', '.join(BACKENDS)}.")
+        with self._lock:
+            if self._backend is not None and name != self._name:
+                raise RuntimeError(f"Backend '{self._name}' is already in use.")
+            self._name = name
+
+    def get(self) -> Any:
+        """Returns the backend module or object, loading it on first use."""
+        if self._backend is None:
+            with self._lock:
+                if self._backend is None:
+                    self._name = self.name
+                    self._backend = load_backend(self._name)
+        return self._backend
+
+    def __getattr__(self, name: str) -> Any:
+        function = self._functions.get(name)
+        if function is not None:
+            return function
+        attr = getattr(self.get(), name)
+        if not inspect.isroutine(attr):
+            return attr
+        function = instrument_sdk_call(name, attr, self.is_error)
+        self._functions[name] = function
+        return function
+
+    def is_error(self, result: Any) -> bool:
+        """Tells whether an SDK result carries a failed ErrorCode."""
+        if isinstance(result, tuple) and result:
+            result = result[0]
+        error_code = self.get().ErrorCode
+        return isinstance(result, error_code) and result != error_code.NO_ERROR
+
+
+sdk = BackendProxy()
@@ -0,0 +1,294 @@
+"""
+Connected device pool.
+
+Every Lum96-compatible reader found on the host is opened and tracked by its
+serial number so that several readers can be driven from one server.
+"""
+
+import enum
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .backend import sdk
+from .scheduler import FAST, LaneLock
+
+
+class Capability(enum.IntFlag):
+    """Optional device features, probed once when a device is opened."""
+
+    NONE = 0
+    LUM96 = enum.auto()
+    UPTIME = enum.auto()
+    SLOT_STATUS = enum.auto()
+    PARTS_ALIGNED = enum.auto()
+    READOUT_ORIENTATION = enum.auto()
+    TEMPERATURE = enum.auto()
+    HUMIDITY = enum.auto()
+    ABS96 = enum.auto()
+    ABS96_WAVELENGTHS = enum.auto()
+
+    # Any measurement capability; devices without one are not connected
+    MEASUREMENTS = LUM96 | ABS96
+
+
+# SDK probe function for each capability
+CAPABILITY_PROBES = {
+    Capability.LUM96: "lum96_measurement_supported",
+    Capability.UPTIME: "device_uptime_supported",
+    Capability.SLOT_STATUS: "device_slot_status_supported",
+    Capability.PARTS_ALIGNED: "device_parts_aligned_supported",
+    Capability.READOUT_ORIENTATION: "device_readout_orientation_supported",
+    Capability.TEMPERATURE: "device_temperature_supported",
+    Capability.HUMIDITY: "device_humidity_supported",
+    Capability.ABS96: "abs96_measurement_supported",
+    Capability.ABS96_WAVELENGTHS: "abs96_available_wavelengths_supported",
+}
+
+
+def probe_capabilities(handle: Any) -> Capability:
+    """Builds the capability bitmap of an open handle."""
+    capabilities = Capability.NONE
+    for capability, probe in CAPABILITY_PROBES.items():
+        if getattr(sdk, probe)(handle):
+            capabilities |= capability
+    return capabilities
+
+
+class ConnectionFault(enum.Enum):
+    """
+    Result codes for calls that never reach the SDK. They are not SDK error
+    codes, so they exist whatever ``ErrorCode`` members the backend defines.
+    """
+
+    # The handle was freed after a connection fault and is not reopened yet
+    HANDLE_LOST = "handle_lost"
+    # The worker process owning the handle died or hung
+    WORKER_FAILED = "worker_failed"
+
+
+def fault_result(name: str, code: Any) -> Any:
+    """What the SDK function ``name`` returns when it fails with ``code``."""
+    if name.startswith("abs96_initialize_"):
+        return code
+    return code, None
+
+
+@dataclass
+class Device:
+    """
+    An open reader handle together with its static information and capability
+    bitmap. Both are read once when the device is opened and never change while
+    the handle stays open. Every SDK call on the handle holds ``lock`` in the
+    fast or bulk lane, so concurrent clients are serialized at the hardware.
+    The lock is reentrant, so bursts of commands that must not interleave can
+    hold it across calls.
+    """
+
+    serial: str
+    handle: Any
+    info: Dict[str, Any] = field(default_factory=dict)
+    capabilities: Capability = Capability.NONE
+    lock: LaneLock = field(init=False, repr=False)
+    # getter name -> (timestamp, result) of its last successful call
+    last_results: Dict[str, Tuple[float, Any]] = field(default_factory=dict, repr=False)
+    # ('single' | 'multiple', wavelengths) the Abs96 measurement was last
+    # initialized with on this handle, or None
+    abs96_setup: Optional[Tuple[str, Tuple[int, ...]]] = field(default=None, repr=False)
+    # ConnectionSupervisor that reopens the handle after a connection fault
+    supervisor: Optional[Any] = field(default=None, repr=False)
+
+    def __post_init__(self):
+        self.lock = LaneLock(self.serial)
+
+    def supports(self, capability: Capability) -> bool:
+        return bool(self.capabilities & capability)
+
+    def capability_names(self) -> List[str]:
+        return [c.name for c in CAPABILITY_PROBES if self.supports(c)]
+
+    def call(self, name: str, *args: Any, lane: str = FAST) -> Any:
+        """Calls the SDK function ``name`` with this device's handle."""
+        with self.lock.lane(lane):
+            result = self._invoke(name, *args)
+        supervisor = self.supervisor
+        if supervisor is not None and supervisor.is_fault(result):
+            supervisor.report(self, name, result)
+            # Reads are safe to repeat, so they are retried once the handle is
+            # back. A caller holding the lock would block the reconnect.
+            if name.startswith("get_device_") and not self.lock.held_by_me() and supervisor.wait_recovered(self):
+                with self.lock.lane(lane):
+                    result = self._invoke(name, *args)
+        if name.startswith("get_device_") and result[0] == sdk.ErrorCode.NO_ERROR:
+            self.last_results[name] = (time.time(), result)
+        return result
+
+    def _invoke(self, name: str, *args: Any) -> Any:
+        if self.handle is None:
+            # Freed after a connection fault and not reopened yet.
+            return fault_result(name, ConnectionFault.HANDLE_LOST)
+        return getattr(sdk, name)(self.handle, *args)
+
+    def close(self) -> None:
+        """Frees the handle, once. Callers hold the bulk lane."""
+        if self.handle is not None:
+            sdk.free_device(self.handle)
+            self.handle = None
+
+    def reopen(self, available: Any) -> Optional[str]:
+        """
+        Replaces a lost handle with a new one for the same serial number,
+        keeping capabilities and information. Callers hold the bulk lane.
+        Returns an error message if the device could not be opened; the
+        handle then stays None.
+        """
+        self.close()
+        result_code, handle = sdk.open_device(available)
+        if result_code != sdk.ErrorCode.NO_ERROR:
+            return f"Failed to open device {self.serial}: {result_code}"
+        self.handle = handle
+        self.abs96_setup = None
+        return None
+
+    def read(self, name: str) -> Tuple[Optional[Any], Optional[float]]:
+        """
+        Fast-lane read of a ``get_device_*`` getter. While another thread runs
+        a bulk command, the last successful result is returned together with
+        its age in seconds instead of waiting, or no result (None) if there is
+        none yet. Live results have no age.
+        """
+        if self.lock.busy_with_bulk():
+            cached = self.last_results.get(name)
+            if cached is None:
+                return None, None
+            return cached[1], time.time() - cached[0]
+        return self.call(name), None
+
+
+def open_device(
+    available: Any, known: Optional[Tuple[Capability, Dict[str, Any]]] = None
+) -> Tuple[Optional[Device], Optional[str]]:
+    """
+    Opens an enumerated device, probes its capabilities and reads its static
+    information. Returns the device or an error message; both are None for a
+    device without a supported measurement, which is closed again. With
+    ``known`` (capabilities, info) from an earlier open, probing is skipped.
+    """
+    result_code, handle = sdk.open_device(available)
+    if result_code != sdk.ErrorCode.NO_ERROR:
+        return None, f"Failed to open device {available.sn}: {result_code}"
+    if known is not None:
+        capabilities, info = known
+        return Device(serial=available.sn, handle=handle, info=dict(info), capabilities=capabilities), None
+    capabilities = probe_capabilities(handle)
+    if not capabilities & Capability.MEASUREMENTS:
+        sdk.free_device(handle)
+        return None, None
+    result_code, dev_info = sdk.get_device_information(handle)
+    if result_code != sdk.ErrorCode.NO_ERROR:
+        sdk.free_device(handle)
+        return None, f"Failed to get device information for {available.sn}: {result_code}"
+    info = {
+        "sn": dev_info.sn,
+        "ref_no": dev_info.ref_no,
+        "version": dev_info.version,
+        "type": dev_info.type,
+    }
+    if capabilities & Capability.ABS96_WAVELENGTHS:
+        result_code, wavelengths = sdk.abs96_get_available_wavelengths(handle)
+        if result_code == sdk.ErrorCode.NO_ERROR:
+            info["abs96_wavelengths"] = list(wavelengths)
+    return Device(serial=dev_info.sn, handle=handle, info=info, capabilities=capabilities), None
+
+
+def _is_device_fault(device_error: Any) -> bool:
+    """Tells whether a get_device_error value (code or enum) reports a fault."""
+    if isinstance(device_error, enum.Enum):
+        device_error = device_error.value
+    return bool(device_error)
+
+
+def check_readiness(device: Device) -> Dict[str, Any]:
+    """
+    Reads slot status, parts alignment and the device error in one locked
+    burst, skipping what the device does not support. Returns whether the
+    reader is ready to measure and, if not, the reasons.
+    """
+    checks: Dict[str, Any] = {}
+    reasons: List[Dict[str, str]] = []
+    with device.lock.lane(FAST):
+        if device.supports(Capability.SLOT_STATUS):
+            result_code, slot_status = device.call("get_device_slot_status")
+            if result_code != sdk.ErrorCode.NO_ERROR:
+                reasons.append({"check": "slot_status", "reason": "read_failed", "detail": str(result_code)})
+            else:
+                checks["slot_status"] = str(slot_status)
+                if slot_status != sdk.DeviceSlotState.OCCUPIED:
+                    reasons.append({"check": "slot_status", "reason": "no_plate", "detail": str(slot_status)})
+        if device.supports(Capability.PARTS_ALIGNED):
+            result_code, aligned = device.call("get_device_parts_aligned")
+            if result_code != sdk.ErrorCode.NO_ERROR:
+                reasons.append({"check": "parts_aligned", "reason": "read_failed", "detail": str(result_code)})
+            else:
+                checks["parts_aligned"] = aligned
+                if not aligned:
+                    reasons.append({"check": "parts_aligned", "reason": "misaligned", "detail": "Parts are not aligned."})
+        result_code, device_error = device.call("get_device_error")
+        if result_code != sdk.ErrorCode.NO_ERROR:
+            reasons.append({"check": "device_error", "reason": "read_failed", "detail": str(result_code)})
+        else:
+            checks["device_error"] = str(device_error)
+            if _is_device_fault(device_error):
+                reasons.append({"check": "device_error", "reason": "device_error", "detail": str(device_error)})
+    return {"ready": not reasons, "checked_at": time.time(), "checks": checks, "reasons": reasons}
+
+
+class DevicePool:
+    """Thread-safe mapping of serial number to open device."""
+
+    def __init__(self):
+        self._devices: "OrderedDict[str, Device]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._devices)
+
+    def __contains__(self, serial: str) -> bool:
+        with self._lock:
+            return serial in self._devices
+
+    def add(self, device: Device) -> None:
+        with self._lock:
+            self._devices[device.serial] = device
+
+    def remove(self, serial: str) -> Optional[Device]:
+        with self._lock:
+            return self._devices.pop(serial, None)
+
+    def get(self, serial: str) -> Optional[Device]:
+        with self._lock:
+            return self._devices.get(serial)
+
+    def first(self) -> Optional[Device]:
+        with self._lock:
+            return next(iter(self._devices.values()), None)
+
+    def all(self) -> List[Device]:
+        with self._lock:
+            return list(self._devices.values())
+
+    def least_busy(
+        self, load: Callable[[Device], int], capability: Capability = Capability.NONE
+    ) -> Optional[Device]:
+        """
+        Returns an idle device if there is one, otherwise the device with the
+        fewest pending commands according to ``load``. Only devices with
+        ``capability`` are considered.
+        """
+        devices = [d for d in self.all() if d.capabilities & capability == capability]
+        if not devices:
+            return None
+        return min(devices, key=load)
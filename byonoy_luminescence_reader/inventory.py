@@ -0,0 +1,158 @@
+"""
+Hot-plug aware device inventory.
+
+A background thread enumerates the attached readers every few seconds and
+keeps them in an inventory together with what is known about each serial:
+the capability bitmap and static information read the first time it was
+opened. Enumeration does not open devices, so it never competes with a
+connected handle or with other software using a reader.
+
+``connect_device`` picks from the inventory: readers seen before are opened
+without probing their capabilities again, and readers without a supported
+measurement are skipped without being opened. Listeners are told whenever a
+reader is plugged in or removed; the server turns these events into MCP
+notifications.
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .backend import sdk
+from .devices import CAPABILITY_PROBES, Capability
+
+logger = logging.getLogger(__name__)
+
+DEVICE_ADDED = "device_added"
+DEVICE_REMOVED = "device_removed"
+
+
+@dataclass
+class InventoryEntry:
+    """An attached reader as enumerated by the SDK."""
+
+    serial: str
+    available: Any = field(repr=False)
+    first_seen: float
+    # Known once the serial has been opened, in this run of the server
+    capabilities: Optional[Capability] = None
+    info: Optional[Dict[str, Any]] = field(default=None, repr=False)
+
+    @property
+    def known(self) -> Optional[Tuple[Capability, Dict[str, Any]]]:
+        if self.capabilities is None or self.info is None:
+            return None
+        return self.capabilities, self.info
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"serial": self.serial, "first_seen": self.first_seen}
+        device_type = getattr(self.available, "type", None)
+        if device_type is not None:
+            data["type"] = getattr(device_type, "name", str(device_type))
+        if self.capabilities is not None:
+            data["capabilities"] = [c.name for c in CAPABILITY_PROBES if self.capabilities & c]
+        return data
+
+
+Listener = Callable[[str, InventoryEntry], None]
+
+
+class DeviceInventory:
+    """
+    The attached readers, refreshed every ``interval`` seconds once started.
+    With an interval of 0 there is no background thread and ``current``
+    enumerates on every call.
+    """
+
+    def __init__(self, interval: float = 2.0):
+        self.interval = interval
+        self._entries: Dict[str, InventoryEntry] = {}
+        # serial -> (capabilities, info), kept when a reader is unplugged
+        self._known: Dict[str, Tuple[Capability, Dict[str, Any]]] = {}
+        self._listeners: List[Listener] = []
+        self._lock = threading.Lock()
+        self._refreshed = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def add_listener(self, listener: Listener) -> None:
+        self._listeners.append(listener)
+
+    def remember(self, serial: str, capabilities: Capability, info: Dict[str, Any]) -> None:
+        """Records what was read when ``serial`` was opened."""
+        with self._lock:
+            self._known[serial] = (capabilities, info)
+            entry = self._entries.get(serial)
+            if entry is not None:
+                entry.capabilities, entry.info = capabilities, info
+
+    def refresh(self) -> Tuple[List[InventoryEntry], List[InventoryEntry]]:
+        """Enumerates the attached readers and returns the (added, removed) entries."""
+        listed = sdk.available_devices()
+        now = time.time()
+        with self._lock:
+            seen = {available.sn: available for available in listed}
+            added = []
+            for serial, available in seen.items():
+                entry = self._entries.get(serial)
+                if entry is None:
+                    entry = InventoryEntry(serial=serial, available=available, first_seen=now)
+                    entry.capabilities, entry.info = self._known.get(serial, (None, None))
+                    self._entries[serial] = entry
+                    added.append(entry)
+                else:
+                    entry.available = available
+            removed = [self._entries.pop(serial) for serial in list(self._entries) if serial not in seen]
+            first = not self._refreshed
+            self._refreshed = True
+        # The first enumeration finds what was attached before, not a hot-plug.
+        if not first:
+            for event, entries in ((DEVICE_ADDED, added), (DEVICE_REMOVED, removed)):
+                for entry in entries:
+                    self._notify(event, entry)
+        return added, removed
+
+    def _notify(self, event: str, entry: InventoryEntry) -> None:
+        logger.info("Inventory: %s %s", event, entry.serial)
+        for listener in self._listeners:
+            try:
+                listener(event, entry)
+            except Exception:
+                logger.exception("Inventory listener failed")
+
+    def entries(self) -> List[InventoryEntry]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def current(self) -> List[InventoryEntry]:
+        """
+        The attached readers. Served from the last background refresh while
+        the inventory runs, otherwise enumerated now.
+        """
+        if not (self.running and self._refreshed):
+            self.refresh()
+        return self.entries()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.interval <= 0 or self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="byonoy-inventory", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Device enumeration failed")
+            self._stop.wait(self.interval)
@@ -0,0 +1,328 @@
+"""
+Measurement job subsystem.
+
+Blocking device commands such as ``lum96_measure`` are executed on a dedicated
+worker thread per reader instead of the MCP event loop. Each submission is
+tracked as a job that clients can poll or await by its ID.
+
+Jobs can carry a deadline and can be cancelled. Queued jobs that are cancelled
+or past their deadline are dropped before they reach the reader; running jobs
+see the request at their next ``Job.check`` call.
+
+Submissions may carry an idempotency key. A retry with the same key attaches to
+the queued or running job, or returns the finished result, instead of starting
+the work again.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Tuple
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_EXPIRED = "expired"
+
+FINISHED_STATES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED, JOB_EXPIRED)
+
+
+class JobTableFull(RuntimeError):
+    """Raised when no more jobs can be accepted."""
+
+
+class KeyConflict(ValueError):
+    """Raised when an idempotency key is reused with different parameters."""
+
+
+class JobStopped(Exception):
+    """
+    Raised inside a running job that was cancelled or ran past its deadline.
+    ``partial`` is kept as the job's result.
+    """
+
+    def __init__(self, status: str, message: str, partial: Any = None):
+        super().__init__(message)
+        self.status = status
+        self.partial = partial
+
+
+@dataclass
+class Job:
+    """A single unit of device work and its outcome."""
+
+    id: str
+    kind: str
+    serial: str
+    params: Dict[str, Any]
+    submitted_at: float = field(default_factory=time.time)
+    status: str = JOB_QUEUED
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    progress: Optional[Dict[str, Any]] = None
+    deadline: Optional[float] = None
+    key: Optional[str] = None
+    cancel_requested: bool = False
+    future: Future = field(default_factory=Future, repr=False)
+    _wakeup: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def expired(self) -> bool:
+        return self.deadline is not None and time.time() > self.deadline
+
+    def check(self, partial: Any = None) -> None:
+        """
+        Called by long-running job functions between steps. Raises JobStopped
+        if the job was cancelled or its deadline has passed.
+        """
+        if self.cancel_requested:
+            raise JobStopped(JOB_CANCELLED, "Job was cancelled.", partial)
+        if self.expired:
+            raise JobStopped(JOB_EXPIRED, "Job deadline expired.", partial)
+
+    def sleep(self, seconds: float, partial: Any = None) -> None:
+        """Sleeps between steps, waking early to stop on cancellation or deadline."""
+        if self.deadline is not None:
+            seconds = min(seconds, max(0.0, self.deadline - time.time()))
+        if seconds > 0:
+            self._wakeup.wait(seconds)
+        self.check(partial)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "serial": self.serial,
+            "status": self.status,
+            "params": self.params,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "deadline": self.deadline,
+        }
+        if self.key is not None:
+            data["idempotency_key"] = self.key
+        if self.progress is not None:
+            data["progress"] = self.progress
+        if self.cancel_requested and not self.finished:
+            data["cancel_requested"] = True
+        if self.result is not None:
+            data["result"] = self.result
+        if self.error is not None:
+            data["error"] = self.error
+        return data
+
+
+class JobManager:
+    """
+    Runs device work on one worker thread per reader and keeps a bounded job
+    table. Commands for the same reader run in submission order, while
+    different readers work in parallel.
+
+    When the table is full, the oldest finished jobs are evicted first. If every
+    tracked job is still pending, new submissions are refused.
+
+    Jobs submitted with an idempotency key are also kept in a separate cache
+    of at most ``max_keys`` entries for ``key_ttl`` seconds, so a retry finds
+    its result even after the job was evicted from the table.
+    """
+
+    def __init__(self, max_jobs: int = 256, max_keys: int = 1024, key_ttl: float = 3600.0):
+        self.max_jobs = max_jobs
+        self.max_keys = max_keys
+        self.key_ttl = key_ttl
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._keys: "OrderedDict[str, Tuple[float, Job]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+
+    def submit(
+        self,
+        kind: str,
+        serial: str,
+        fn: Callable[[Job], Any],
+        params: Dict[str, Any],
+        deadline: Optional[float] = None,
+    ) -> Job:
+        """
+        Queues ``fn`` on the worker of reader ``serial`` and returns its job.
+        ``fn`` is called with the job so it can report progress and check for
+        cancellation. ``deadline`` is a Unix time after which the job is dropped.
+        """
+        job = Job(id=uuid.uuid4().hex[:12], kind=kind, serial=serial, params=params, deadline=deadline)
+        with self._lock:
+            executor = self._add(job)
+        executor.submit(self._run, job, fn)
+        return job
+
+    def submit_once(
+        self,
+        key: str,
+        kind: str,
+        serial: str,
+        fn: Callable[[Job], Any],
+        params: Dict[str, Any],
+        deadline: Optional[float] = None,
+    ) -> Tuple[Job, bool]:
+        """
+        Like ``submit``, but at most once per idempotency ``key``. Returns the
+        job and whether it was newly submitted. A key whose job failed, was
+        cancelled or expired can be submitted again.
+        """
+        now = time.time()
+        with self._lock:
+            self._expire_keys(now)
+            entry = self._keys.get(key)
+            if entry is not None:
+                job = entry[1]
+                if job.kind != kind or job.params != params:
+                    raise KeyConflict(f"Idempotency key '{key}' was used for a different request.")
+                if job.status not in (JOB_FAILED, JOB_CANCELLED, JOB_EXPIRED):
+                    return job, False
+            job = Job(
+                id=uuid.uuid4().hex[:12], kind=kind, serial=serial, params=params, deadline=deadline, key=key
+            )
+            executor = self._add(job)
+            self._keys[key] = (now + self.key_ttl, job)
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+        executor.submit(self._run, job, fn)
+        return job, True
+
+    def find_key(self, key: str) -> Optional[Job]:
+        """Returns the job submitted under an idempotency key, if it is still cached."""
+        with self._lock:
+            self._expire_keys(time.time())
+            entry = self._keys.get(key)
+        return entry[1] if entry is not None else None
+
+    def _add(self, job: Job) -> ThreadPoolExecutor:
+        """Adds a job to the table and returns its reader's worker. Needs the lock."""
+        self._evict()
+        if len(self._jobs) >= self.max_jobs:
+            raise JobTableFull(
+                f"Too many pending jobs (limit {self.max_jobs})."
+            )
+        self._jobs[job.id] = job
+        executor = self._executors.get(job.serial)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix=f"byonoy-{job.serial}"
+            )
+            self._executors[job.serial] = executor
+        return executor
+
+    def _expire_keys(self, now: float) -> None:
+        """Drops idempotency keys past their lifetime. Needs the lock."""
+        while self._keys:
+            key, (expires, _) = next(iter(self._keys.items()))
+            if expires > now:
+                break
+            del self._keys[key]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and job.status == JOB_QUEUED and job.expired:
+            self._finish_queued(job, JOB_EXPIRED, "Error: Job deadline expired before it started.")
+        return job
+
+    def cancel(self, job: Job) -> bool:
+        """
+        Cancels a job. A queued job is dropped at once; a running job is asked
+        to stop at its next check. Returns False if the job already finished.
+        """
+        if self._finish_queued(job, JOB_CANCELLED, "Error: Job was cancelled before it started."):
+            return True
+        with self._lock:
+            if job.finished:
+                return False
+            job.cancel_requested = True
+        job._wakeup.set()
+        return True
+
+    def pending_count(self, serial: Optional[str] = None) -> int:
+        """Counts unfinished jobs, optionally only those of one reader."""
+        with self._lock:
+            return sum(
+                1
+                for job in self._jobs.values()
+                if not job.finished and (serial is None or job.serial == serial)
+            )
+
+    def release_worker(self, serial: str) -> None:
+        """Stops the worker thread of a reader that has been disconnected."""
+        with self._lock:
+            executor = self._executors.pop(serial, None)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    async def wait(self, job: Job, timeout: Optional[float] = None) -> Job:
+        """
+        Waits for a job without blocking the event loop.
+        Returns the job in whatever state it is in once the timeout expires.
+        """
+        if not job.finished:
+            try:
+                await asyncio.wait_for(
+                    asyncio.shield(asyncio.wrap_future(job.future)), timeout
+                )
+            except asyncio.TimeoutError:
+                pass
+        return job
+
+    def _finish_queued(self, job: Job, status: str, error: str) -> bool:
+        """Moves a job that has not started yet to a final state."""
+        with self._lock:
+            if job.status != JOB_QUEUED:
+                return False
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+        job.future.set_result(None)
+        return True
+
+    def _run(self, job: Job, fn: Callable[[Job], Any]) -> None:
+        if job.expired:
+            self._finish_queued(job, JOB_EXPIRED, "Error: Job deadline expired before it started.")
+        with self._lock:
+            if job.status != JOB_QUEUED:
+                # Cancelled or expired while queued: never reaches the reader.
+                return
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+        try:
+            job.result = fn(job)
+            job.status = JOB_DONE
+        except JobStopped as exc:
+            job.result = exc.partial
+            job.error = f"Error: {exc}"
+            job.status = exc.status
+        except Exception as exc:
+            job.error = f"Error: {exc}"
+            job.status = JOB_FAILED
+        finally:
+            job.finished_at = time.time()
+            job.future.set_result(None)
+
+    def _evict(self) -> None:
+        # Caller holds self._lock.
+        if len(self._jobs) < self.max_jobs:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.finished]:
+            del self._jobs[job_id]
+            if len(self._jobs) < self.max_jobs:
+                return
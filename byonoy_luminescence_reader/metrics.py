@@ -0,0 +1,257 @@
+"""
+Latency instrumentation.
+
+Every MCP tool and every SDK call is timed into a log-linear latency histogram
+(in the spirit of HdrHistogram: constant memory, about 3% relative precision)
+together with an error counter. The registry can be read as a JSON-friendly
+dict or rendered in the Prometheus text format, optionally written to a file
+for the node exporter textfile collector.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Label used for each metric group in the Prometheus output
+GROUP_LABELS = {"tool": "tool", "sdk": "function", "lane_wait": "lane", "connection": "event"}
+
+# Upper bounds (seconds) of the Prometheus histogram buckets
+PROMETHEUS_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+class LatencyHistogram:
+    """
+    Histogram of durations in microseconds. Values below 64 µs are counted
+    exactly; above that each power of two is split into 32 linear sub-buckets.
+    """
+
+    SUB_BUCKETS = 32
+    MAX_SHIFT = 31  # covers about 19 hours
+
+    def __init__(self):
+        self.counts = [0] * ((self.MAX_SHIFT + 2) * self.SUB_BUCKETS)
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        if micros < 2 * cls.SUB_BUCKETS:
+            return micros
+        shift = min(micros.bit_length() - 6, cls.MAX_SHIFT)
+        sub = min(micros >> shift, 2 * cls.SUB_BUCKETS - 1)
+        return shift * cls.SUB_BUCKETS + sub
+
+    @classmethod
+    def _upper(cls, index: int) -> float:
+        """Upper bound of a bucket in seconds."""
+        if index < 2 * cls.SUB_BUCKETS:
+            return (index + 1) / 1e6
+        shift = index // cls.SUB_BUCKETS - 1
+        sub = index - shift * cls.SUB_BUCKETS
+        return ((sub + 1) << shift) / 1e6
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        index = self._index(max(0, int(seconds * 1e6)))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+            if error:
+                self.errors += 1
+
+    def percentile(self, q: float) -> float:
+        """Returns the upper bound of the bucket holding quantile ``q``, in seconds."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = max(1, int(q * self.count + 0.5))
+            seen = 0
+            for index, n in enumerate(self.counts):
+                seen += n
+                if seen >= target:
+                    return min(self._upper(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds: Tuple[float, ...]) -> List[int]:
+        """Counts of values at or below each bound, for Prometheus buckets."""
+        result = []
+        with self._lock:
+            seen = 0
+            index = 0
+            for bound in bounds:
+                while index < len(self.counts) and self._upper(index) <= bound:
+                    seen += self.counts[index]
+                    index += 1
+                result.append(seen)
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": 1000 * self.total / self.count if self.count else 0.0,
+            "p50_ms": 1000 * self.percentile(0.50),
+            "p90_ms": 1000 * self.percentile(0.90),
+            "p95_ms": 1000 * self.percentile(0.95),
+            "p99_ms": 1000 * self.percentile(0.99),
+            "max_ms": 1000 * self.max,
+        }
+
+
+class MetricsRegistry:
+    """Latency histograms grouped by kind ('tool', 'sdk', ...) and name."""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._gauges: Dict[Tuple[str, str], Callable[[], float]] = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def histogram(self, group: str, name: str) -> LatencyHistogram:
+        key = (group, name)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def gauge(self, group: str, name: str, read: Callable[[], float]) -> None:
+        """Registers a value that is read whenever metrics are exported."""
+        with self._lock:
+            self._gauges[(group, name)] = read
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            histograms = dict(self._histograms)
+            gauges = dict(self._gauges)
+        data: Dict[str, Any] = {"uptime_seconds": time.time() - self.started_at}
+        for (group, name), histogram in sorted(histograms.items()):
+            data.setdefault(group, {})[name] = histogram.summary()
+        for (group, name), read in sorted(gauges.items()):
+            data.setdefault(group, {})[name] = read()
+        return data
+
+    def prometheus_text(self) -> str:
+        """Renders all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = dict(self._histograms)
+            gauges = dict(self._gauges)
+        lines: List[str] = []
+        for group in sorted({g for g, _ in histograms}):
+            label = GROUP_LABELS.get(group, "name")
+            family = f"byonoy_mcp_{group}_duration_seconds"
+            errors = f"byonoy_mcp_{group}_errors_total"
+            lines.append(f"# TYPE {family} histogram")
+            error_lines = [f"# TYPE {errors} counter"]
+            for (g, name), histogram in sorted(histograms.items()):
+                if g != group:
+                    continue
+                labels = f'{label}="{name}"'
+                for bound, n in zip(PROMETHEUS_BUCKETS, histogram.cumulative(PROMETHEUS_BUCKETS)):
+                    lines.append(f'{family}_bucket{{{labels},le="{bound}"}} {n}')
+                lines.append(f'{family}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"{family}_sum{{{labels}}} {histogram.total}")
+                lines.append(f"{family}_count{{{labels}}} {histogram.count}")
+                error_lines.append(f"{errors}{{{labels}}} {histogram.errors}")
+            lines.extend(error_lines)
+        for group in sorted({g for g, _ in gauges}):
+            family = f"byonoy_mcp_{group}"
+            lines.append(f"# TYPE {family} gauge")
+            for (g, name), read in sorted(gauges.items()):
+                if g == group:
+                    lines.append(f'{family}{{name="{name}"}} {read()}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str) -> None:
+        """Writes the metrics atomically so the exporter never sees a partial file."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, path)
+
+    def start_prometheus_writer(self, path: str, interval: float = 15.0) -> threading.Thread:
+        def loop() -> None:
+            while True:
+                try:
+                    self.write_prometheus_file(path)
+                except OSError:
+                    logger.exception("Failed to write metrics to %s", path)
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, name="byonoy-metrics", daemon=True)
+        thread.start()
+        return thread
+
+
+registry = MetricsRegistry()
+
+
+def _is_error_result(result: Any) -> bool:
+    return isinstance(result, str) and result.startswith("Error:")
+
+
+def instrument_tool(fn: Callable) -> Callable:
+    """
+    Wraps an MCP tool function so that its latency and errors are recorded.
+    Results starting with 'Error:' count as errors.
+    """
+    histogram = registry.histogram("tool", fn.__name__)
+
+    if asyncio.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            error = True
+            try:
+                result = await fn(*args, **kwargs)
+                error = _is_error_result(result)
+                return result
+            finally:
+                histogram.record(time.perf_counter() - start, error)
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        error = True
+        try:
+            result = fn(*args, **kwargs)
+            error = _is_error_result(result)
+            return result
+        finally:
+            histogram.record(time.perf_counter() - start, error)
+
+    return wrapper
+
+
+def instrument_sdk_call(name: str, fn: Callable, is_error: Callable[[Any], bool]) -> Callable:
+    """Wraps an SDK function so that its latency and failed result codes are recorded."""
+    histogram = registry.histogram("sdk", name)
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        error = True
+        try:
+            result = fn(*args, **kwargs)
+            error = is_error(result)
+            return result
+        finally:
+            histogram.record(time.perf_counter() - start, error)
+
+    return wrapper
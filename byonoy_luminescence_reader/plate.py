@@ -0,0 +1,91 @@
+"""
+96-well plate geometry and measurement payload encodings.
+
+Wells are indexed row by row: index 0 is A1, index 11 is A12, index 12 is B1
+and index 95 is H12.
+"""
+
+import base64
+import math
+import sys
+from array import array
+from typing import Any, List, Optional
+
+ROWS = "ABCDEFGH"
+COLUMNS = 12
+WELLS = len(ROWS) * COLUMNS
+
+ENCODINGS = ("list", "float32", "matrix", "sparse")
+
+
+def well_name(index: int) -> str:
+    """Returns the name of a well index, e.g. 13 -> 'B2'."""
+    return f"{ROWS[index // COLUMNS]}{index % COLUMNS + 1}"
+
+
+def pack_wells(selected_wells: List[bool]) -> bytes:
+    """
+    Packs 96 booleans into a 12-byte big-endian bitmask. The first well is the
+    most significant bit, so the hex form reads left to right.
+    """
+    mask = 0
+    for selected in selected_wells:
+        mask = mask << 1 | bool(selected)
+    return mask.to_bytes(WELLS // 8, "big")
+
+
+def unpack_wells(mask: bytes) -> List[bool]:
+    bits = int.from_bytes(mask, "big")
+    return [bool(bits >> (WELLS - 1 - i) & 1) for i in range(WELLS)]
+
+
+def _json_value(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def encode_values(
+    values: List[float], encoding: str = "list", selected_wells: Optional[List[bool]] = None
+) -> Any:
+    """
+    Encodes the 96 values of a plate.
+
+    - ``list``: the values as a plain JSON list (default).
+    - ``float32``: base64 of the values as little-endian float32.
+    - ``matrix``: one list of 12 values per row, keyed 'A' to 'H'.
+    - ``sparse``: only the selected wells, keyed by well name.
+    """
+    if encoding == "list":
+        return values
+    if encoding == "float32":
+        data = array("f", values)
+        if sys.byteorder == "big":
+            data.byteswap()
+        return {
+            "encoding": "float32",
+            "byte_order": "little",
+            "count": len(data),
+            "data": base64.b64encode(data.tobytes()).decode("ascii"),
+        }
+    if encoding == "matrix":
+        return {
+            row: [_json_value(v) for v in values[r * COLUMNS:(r + 1) * COLUMNS]]
+            for r, row in enumerate(ROWS)
+        }
+    if encoding == "sparse":
+        selected = selected_wells or [True] * WELLS
+        return {well_name(i): _json_value(v) for i, v in enumerate(values) if selected[i]}
+    raise ValueError(f"Unknown encoding '{encoding}'. Use one of: {', '.join(ENCODINGS)}.")
+
+
+def encode_series(
+    rows: List[List[float]], encoding: str = "list", selected_wells: Optional[List[bool]] = None
+) -> Any:
+    """
+    Encodes a read x well array, e.g. a kinetic run. ``float32`` packs all reads
+    into one base64 block in read-major order; the other encodings are applied
+    to each read.
+    """
+    if encoding == "float32":
+        flat = [v for row in rows for v in row]
+        return {**encode_values(flat, "float32"), "shape": [len(rows), WELLS]}
+    return [encode_values(row, encoding, selected_wells) for row in rows]
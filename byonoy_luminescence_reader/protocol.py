@@ -0,0 +1,98 @@
+"""
+Declarative plate protocols.
+
+A protocol is a list of steps that the server runs end to end on one reader,
+so a stack of plates costs the agent one tool call instead of several per
+plate. Each step is a dict with a ``step`` key and its options:
+
+- ``{"step": "wait_for_plate", "timeout_seconds": 600, "poll_seconds": 1}``:
+  polls the slot status until a plate is inserted.
+- ``{"step": "wait_for_removal", ...}``: the same, until the slot is empty.
+- ``{"step": "measure", "mode": "SENSITIVE", "selected_wells": "A1:H6"}``:
+  reads the plate; ``adaptive_threshold`` works as in ``measure``.
+- ``{"step": "wait", "seconds": 60}``: waits on a timer.
+- ``{"step": "record_temperature"}``: records the reader temperature.
+
+This module only validates steps; they are executed by the server.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+# Step name -> option defaults; None marks an option without default
+STEP_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "wait_for_plate": {"timeout_seconds": 600.0, "poll_seconds": 1.0},
+    "wait_for_removal": {"timeout_seconds": 600.0, "poll_seconds": 1.0},
+    "measure": {"mode": "SENSITIVE", "selected_wells": None, "adaptive_threshold": None},
+    "wait": {"seconds": None},
+    "record_temperature": {},
+}
+
+# Options that must be given
+REQUIRED_OPTIONS = {"wait": ("seconds",)}
+
+# Options that must be non-negative numbers when given
+NUMERIC_OPTIONS = ("timeout_seconds", "poll_seconds", "seconds", "adaptive_threshold")
+
+# Options that must be strings when given
+TEXT_OPTIONS = ("mode",)
+
+MAX_STEPS = 1000
+
+
+@dataclass
+class ProtocolStep:
+    """One validated protocol step."""
+
+    index: int
+    kind: str
+    options: Dict[str, Any]
+
+    def describe(self) -> str:
+        return f"step {self.index + 1} ({self.kind})"
+
+
+def parse_protocol(steps: List[Dict[str, Any]], repeat: int = 1) -> List[ProtocolStep]:
+    """
+    Validates a list of step dicts and fills in option defaults.
+    Raises ValueError with a message naming the offending step.
+    """
+    if not steps:
+        raise ValueError("A protocol needs at least one step.")
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1.")
+    if len(steps) * repeat > MAX_STEPS:
+        raise ValueError(f"A protocol may run at most {MAX_STEPS} steps.")
+    parsed = []
+    for index, step in enumerate(steps):
+        if not isinstance(step, dict) or "step" not in step:
+            raise ValueError(f"Step {index + 1} must be an object with a 'step' key.")
+        kind = step["step"]
+        defaults = STEP_OPTIONS.get(kind)
+        if defaults is None:
+            raise ValueError(f"Step {index + 1}: unknown step '{kind}'. Use one of: {', '.join(STEP_OPTIONS)}.")
+        unknown = set(step) - set(defaults) - {"step"}
+        if unknown:
+            raise ValueError(f"Step {index + 1} ({kind}): unknown options {', '.join(sorted(unknown))}.")
+        for name in REQUIRED_OPTIONS.get(kind, ()):
+            if step.get(name) is None:
+                raise ValueError(f"Step {index + 1} ({kind}): '{name}' is required.")
+        options = {**defaults, **{k: v for k, v in step.items() if k != "step"}}
+        for name in NUMERIC_OPTIONS:
+            value = options.get(name)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"Step {index + 1} ({kind}): '{name}' must be a non-negative number.")
+        for name in TEXT_OPTIONS:
+            if name in options and not isinstance(options[name], str):
+                raise ValueError(f"Step {index + 1} ({kind}): '{name}' must be a string.")
+        selected_wells = options.get("selected_wells")
+        if selected_wells is not None and not isinstance(selected_wells, (str, list)):
+            raise ValueError(
+                f"Step {index + 1} ({kind}): 'selected_wells' must be a selection expression or a list of 96 booleans."
+            )
+        if options.get("poll_seconds") == 0:
+            raise ValueError(f"Step {index + 1} ({kind}): 'poll_seconds' must be positive.")
+        parsed.append(ProtocolStep(index=index, kind=kind, options=options))
+    return parsed
@@ -0,0 +1,103 @@
+"""
+Device command scheduling.
+
+Commands on a reader are split into two lanes:
+
+- ``bulk``: measurements, which hold the reader for seconds to minutes.
+- ``fast``: short status and telemetry reads.
+
+Each reader has one ``LaneLock``. When it is released, waiting fast commands
+are granted before bulk ones, so a status read never queues behind the next
+plate. While a bulk command holds the reader, fast reads can be answered from
+the last known value instead of waiting (see ``Device.read``).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .metrics import registry
+
+FAST = "fast"
+BULK = "bulk"
+LANES = (FAST, BULK)
+
+
+class LaneLock:
+    """
+    Reentrant lock with a fast and a bulk lane. Queue depth and wait time of
+    each lane are reported to the metrics registry.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._cond = threading.Condition(threading.Lock())
+        self._owner: Optional[int] = None
+        self._owner_lane: Optional[str] = None
+        self._depth = 0
+        self._since = 0.0
+        # Times the lock was taken by a thread that did not hold it already
+        self.grants = 0
+        self._waiting: Dict[str, int] = {lane: 0 for lane in LANES}
+        self._wait_times = {lane: registry.histogram("lane_wait", f"{name}:{lane}") for lane in LANES}
+        for lane in LANES:
+            registry.gauge("lane_queue_depth", f"{name}:{lane}", lambda lane=lane: self._waiting[lane])
+
+    def acquire(self, lane: str = FAST, timeout: Optional[float] = None) -> bool:
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                return True
+            start = time.perf_counter()
+            self._waiting[lane] += 1
+            try:
+                granted = self._cond.wait_for(
+                    lambda: self._owner is None and (lane == FAST or self._waiting[FAST] == 0),
+                    timeout,
+                )
+            finally:
+                self._waiting[lane] -= 1
+            if not granted:
+                return False
+            self._owner = me
+            self._owner_lane = lane
+            self._depth = 1
+            self._since = time.time()
+            self.grants += 1
+        self._wait_times[lane].record(time.perf_counter() - start)
+        return True
+
+    def release(self) -> None:
+        with self._cond:
+            if self._owner != threading.get_ident():
+                raise RuntimeError("Cannot release a lock held by another thread.")
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                self._owner_lane = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def lane(self, lane: str = FAST) -> Iterator[None]:
+        self.acquire(lane)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def held_by_me(self) -> bool:
+        return self._owner == threading.get_ident()
+
+    def busy_with_bulk(self) -> bool:
+        """True while another thread runs a bulk command."""
+        return self._owner_lane == BULK and not self.held_by_me()
+
+    def state(self) -> Dict[str, object]:
+        with self._cond:
+            return {
+                "busy_lane": self._owner_lane,
+                "busy_seconds": time.time() - self._since if self._owner is not None else 0.0,
+                "waiting": dict(self._waiting),
+            }
@@ -0,0 +1,225 @@
+"""
+Well-selection expressions and named plate layouts.
+
+Instead of a list of 96 booleans, wells can be selected with a short
+expression. Matching is case-insensitive.
+
+- ``all`` / ``none``
+- wells and rectangles: ``A1``, ``A1:H6``, ``A1:B2, H12``
+- rows and columns: ``rows B,D``, ``row A``, ``rows A-C``, ``cols 1-3``, ``col 12``
+- a 24-digit hex bitmask as returned in ``well_mask`` (first well = most
+  significant bit), optionally prefixed with ``0x``
+- a saved layout: ``@name``
+
+Terms separated by ``;`` or ``+`` are combined, and ``X except Y`` removes the
+wells of ``Y`` from ``X``. For example ``cols 1-2 + rows H except @controls``.
+
+Compiled expressions are kept in an LRU cache, so an agent repeating the same
+selection pays for parsing once.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+from .plate import COLUMNS, ROWS, WELLS, pack_wells, unpack_wells, well_name
+
+ALL_WELLS = (1 << WELLS) - 1
+
+# What the measurement tools accept for 'selected_wells'
+WellSelection = Union[List[bool], str]
+
+_HEX = re.compile(r"(?:0x)?([0-9a-f]{24})")
+_WELL = re.compile(r"([a-h])(\d{1,2})")
+_KEYWORD = re.compile(r"(rows?|cols?|columns?)\b\s*(.*)")
+_LAYOUT_NAME = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+
+
+def _bit(row: int, column: int) -> int:
+    return 1 << (WELLS - 1 - (row * COLUMNS + column))
+
+
+def _rectangle(rows: range, columns: range) -> int:
+    mask = 0
+    for r in rows:
+        for c in columns:
+            mask |= _bit(r, c)
+    return mask
+
+
+def _well(text: str) -> Tuple[int, int]:
+    match = _WELL.fullmatch(text)
+    if match is None or not 1 <= int(match.group(2)) <= COLUMNS:
+        raise ValueError(f"'{text}' is not a well name (A1 to H12).")
+    return ROWS.lower().index(match.group(1)), int(match.group(2)) - 1
+
+
+def _items(text: str) -> List[str]:
+    items = [item for item in re.split(r"[\s,]+", text) if item]
+    if not items:
+        raise ValueError("Expected a list of rows, columns or wells.")
+    return items
+
+
+def _span(item: str, parse: Callable[[str], int]) -> range:
+    """Parses 'x' or 'x-y' into an inclusive index range."""
+    first, sep, last = item.partition("-")
+    start = parse(first)
+    end = parse(last) if sep else start
+    if end < start:
+        raise ValueError(f"Range '{item}' is reversed.")
+    return range(start, end + 1)
+
+
+def _row(text: str) -> int:
+    if len(text) != 1 or text not in ROWS.lower():
+        raise ValueError(f"'{text}' is not a row (A to H).")
+    return ROWS.lower().index(text)
+
+
+def _column(text: str) -> int:
+    if not text.isdigit() or not 1 <= int(text) <= COLUMNS:
+        raise ValueError(f"'{text}' is not a column (1 to {COLUMNS}).")
+    return int(text) - 1
+
+
+def _compile_term(term: str, layouts: Mapping[str, str]) -> int:
+    if term == "all":
+        return ALL_WELLS
+    if term == "none":
+        return 0
+    if term.startswith("@"):
+        mask = layouts.get(term[1:])
+        if mask is None:
+            raise ValueError(f"Unknown plate layout '{term[1:]}'.")
+        return int(mask, 16)
+    match = _HEX.fullmatch(term)
+    if match is not None:
+        return int(match.group(1), 16)
+    match = _KEYWORD.fullmatch(term)
+    if match is not None:
+        mask = 0
+        for item in _items(match.group(2)):
+            if match.group(1).startswith("row"):
+                mask |= _rectangle(_span(item, _row), range(COLUMNS))
+            else:
+                mask |= _rectangle(range(len(ROWS)), _span(item, _column))
+        return mask
+    mask = 0
+    for item in _items(term):
+        first, sep, last = item.partition(":")
+        r1, c1 = _well(first)
+        r2, c2 = _well(last) if sep else (r1, c1)
+        mask |= _rectangle(range(min(r1, r2), max(r1, r2) + 1), range(min(c1, c2), max(c1, c2) + 1))
+    return mask
+
+
+def _compile_union(text: str, layouts: Mapping[str, str]) -> int:
+    mask = 0
+    for term in re.split(r"[;+]", text):
+        term = term.strip()
+        if not term:
+            raise ValueError("Empty term in selection.")
+        mask |= _compile_term(term, layouts)
+    return mask
+
+
+def _compile_mask(expression: str, layouts: Mapping[str, str]) -> int:
+    include, _, exclude = expression.strip().lower().partition(" except ")
+    mask = _compile_union(include, layouts)
+    if exclude:
+        mask &= ~_compile_union(exclude, layouts)
+    return mask
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_cached(expression: str) -> int:
+    return _compile_mask(expression, {})
+
+
+def compile_mask(expression: str, layouts: Optional[Mapping[str, str]] = None) -> int:
+    """
+    Compiles a selection expression into a 96-bit mask, first well in the
+    most significant bit. Raises ValueError for invalid expressions.
+    """
+    if "@" in expression:
+        # Layouts can change between calls, so these are not cached.
+        return _compile_mask(expression, layouts or {})
+    return _compile_cached(expression)
+
+
+def compile_selection(expression: str, layouts: Optional[Mapping[str, str]] = None) -> List[bool]:
+    """Compiles a selection expression into 96 booleans for ``selected_wells``."""
+    return unpack_wells(compile_mask(expression, layouts).to_bytes(WELLS // 8, "big"))
+
+
+def describe_selection(selected_wells: List[bool]) -> Dict[str, object]:
+    """Summarizes a selection: well count, hex mask and well names."""
+    return {
+        "count": sum(map(bool, selected_wells)),
+        "well_mask": pack_wells(selected_wells).hex().upper(),
+        "wells": [well_name(i) for i, selected in enumerate(selected_wells) if selected],
+    }
+
+
+class LayoutStore:
+    """
+    Named well selections, saved as JSON so they survive restarts. Each layout
+    keeps its source expression and compiled mask. With no path, layouts are
+    kept in memory only.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._layouts: Optional[Dict[str, Dict[str, str]]] = None
+
+    def _load(self) -> Dict[str, Dict[str, str]]:
+        """Reads the layout file on first use. Needs the lock."""
+        if self._layouts is None:
+            self._layouts = {}
+            if self.path and os.path.exists(self.path):
+                with open(self.path) as f:
+                    self._layouts = json.load(f)
+        return self._layouts
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._layouts, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.path)
+
+    def masks(self) -> Dict[str, str]:
+        """Layout name -> hex mask, for ``compile_selection``."""
+        with self._lock:
+            return {name: layout["well_mask"] for name, layout in self._load().items()}
+
+    def list(self) -> Dict[str, Dict[str, str]]:
+        with self._lock:
+            return {name: dict(layout) for name, layout in self._load().items()}
+
+    def save(self, name: str, expression: str, description: Optional[str] = None) -> Dict[str, str]:
+        """Compiles and stores a layout. Raises ValueError for a bad name or expression."""
+        if _LAYOUT_NAME.fullmatch(name) is None:
+            raise ValueError("Layout names may only contain letters, digits, '_', '.' and '-'.")
+        mask = compile_mask(expression, self.masks())
+        layout = {"expression": expression, "well_mask": f"{mask:024X}"}
+        if description:
+            layout["description"] = description
+        with self._lock:
+            self._load()[name.lower()] = layout
+            self._save()
+        return layout
+
+    def delete(self, name: str) -> bool:
+        with self._lock:
+            if self._load().pop(name.lower(), None) is None:
+                return False
+            self._save()
+        return True
@@ -1,259 +1,1766 @@
-from mcp.server.fastmcp import FastMCP
-import byonoy_devices as byonoy
-from typing import List, Optional, Any, Dict
+from mcp.server.fastmcp import Context, FastMCP
+from pydantic import AnyUrl
+import anyio
+import argparse
+import asyncio
+import functools
+import os
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, List, Optional, Any, Dict, Tuple
+
+from .backend import BACKENDS, sdk
+from .devices import Capability, Device, DevicePool, check_readiness, open_device
+from .inventory import DeviceInventory, InventoryEntry
+from .jobs import JOB_DONE, JOB_FAILED, Job, JobManager, JobStopped, JobTableFull, KeyConflict
+from .metrics import instrument_tool, registry
+from .scheduler import BULK, FAST
+from .plate import ENCODINGS, WELLS, encode_series, encode_values, pack_wells, unpack_wells
+from .protocol import ProtocolStep, parse_protocol
+from .selection import ALL_WELLS, LayoutStore, WellSelection, compile_selection, describe_selection
+from .store import MeasurementStore
+from .supervisor import ConnectionSupervisor
+from .telemetry import EnvironmentSampler, SnapshotCache
+from .workers import open_worker_device
+
+if TYPE_CHECKING:
+    # NumPy is loaded with the analysis tools, on first use.
+    import numpy as np
+
+logger = logging.getLogger(__name__)
 
 # Create an MCP server
 mcp = FastMCP("Byonoy Luminescence Reader")
 
-# Global state to hold device handle and information
-device_state: Dict[str, Any] = {
-    "handle": None,
-    "info": None,
+def _run_in_thread(fn):
+    """
+    Turns a blocking tool into an async one that runs in a worker thread, so a
+    tool waiting for a busy reader never stalls the event loop or other clients.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await anyio.to_thread.run_sync(functools.partial(fn, *args, **kwargs))
+    return wrapper
+
+def tool():
+    """
+    Registers an MCP tool with latency and error instrumentation.
+    Blocking tools are served from worker threads.
+    """
+    def decorator(fn):
+        instrumented = instrument_tool(fn)
+        if asyncio.iscoroutinefunction(fn):
+            mcp.tool()(instrumented)
+        else:
+            mcp.tool()(_run_in_thread(instrumented))
+        return instrumented
+    return decorator
+
+@mcp.resource("metrics://latency", mime_type="application/json")
+def latency_metrics() -> Dict[str, Any]:
+    """Latency histograms and error counts per tool and per SDK function."""
+    return registry.snapshot()
+
+# Every connected reader, keyed by serial number
+pool = DevicePool()
+
+# Serializes connect_device/disconnect_device between concurrent clients
+connection_lock = threading.Lock()
+
+# Attached readers, re-enumerated every BYONOY_MCP_INVENTORY_INTERVAL seconds
+inventory = DeviceInventory(interval=float(os.environ.get("BYONOY_MCP_INVENTORY_INTERVAL", "2")))
+
+INVENTORY_URI = "devices://inventory"
+
+# Sessions subscribed to the inventory resource, with the event loop serving each
+_inventory_subscribers: Dict[Any, asyncio.AbstractEventLoop] = {}
+
+def _inventory_list() -> List[Dict[str, Any]]:
+    return [{**entry.to_dict(), "connected": entry.serial in pool} for entry in inventory.current()]
+
+@mcp.resource(INVENTORY_URI, mime_type="application/json")
+def device_inventory() -> List[Dict[str, Any]]:
+    """
+    Readers attached to the host and whether they are connected. Subscribe to
+    be notified when a reader is plugged in or removed.
+    """
+    return _inventory_list()
+
+@mcp._mcp_server.subscribe_resource()
+async def _subscribe_resource(uri: AnyUrl) -> None:
+    if str(uri) == INVENTORY_URI:
+        _inventory_subscribers[mcp._mcp_server.request_context.session] = asyncio.get_running_loop()
+
+@mcp._mcp_server.unsubscribe_resource()
+async def _unsubscribe_resource(uri: AnyUrl) -> None:
+    if str(uri) == INVENTORY_URI:
+        _inventory_subscribers.pop(mcp._mcp_server.request_context.session, None)
+
+_lowlevel_capabilities = mcp._mcp_server.get_capabilities
+
+def _get_capabilities(*args: Any, **kwargs: Any) -> Any:
+    """Advertises resource subscriptions, which the low-level server always reports as unsupported."""
+    capabilities = _lowlevel_capabilities(*args, **kwargs)
+    if capabilities.resources is not None:
+        capabilities.resources.subscribe = True
+    return capabilities
+
+mcp._mcp_server.get_capabilities = _get_capabilities
+
+async def _send_inventory_event(session: Any, data: Dict[str, Any]) -> None:
+    try:
+        await session.send_resource_updated(AnyUrl(INVENTORY_URI))
+        await session.send_log_message("info", data, logger="byonoy.inventory")
+    except Exception:
+        # The client went away.
+        _inventory_subscribers.pop(session, None)
+
+def _on_inventory_event(event: str, entry: InventoryEntry) -> None:
+    """Forwards a hot-plug event from the inventory thread to every subscribed client."""
+    data = {"event": event, **entry.to_dict(), "connected": entry.serial in pool}
+    for session, loop in list(_inventory_subscribers.items()):
+        if loop.is_closed():
+            _inventory_subscribers.pop(session, None)
+            continue
+        asyncio.run_coroutine_threadsafe(_send_inventory_event(session, data), loop)
+
+inventory.add_listener(_on_inventory_event)
+
+def _find_attached(serial: str) -> Any:
+    """The enumerated device for a serial number, or None if it is not attached."""
+    return next((entry.available for entry in inventory.current() if entry.serial == serial), None)
+
+# Reopens connected readers that drop off the bus, with exponential backoff
+supervisor = ConnectionSupervisor(
+    _find_attached,
+    initial_backoff=float(os.environ.get("BYONOY_MCP_RECONNECT_BACKOFF", "0.5")),
+    max_backoff=float(os.environ.get("BYONOY_MCP_RECONNECT_MAX_BACKOFF", "10")),
+    wait=float(os.environ.get("BYONOY_MCP_RECONNECT_WAIT", "10")),
+)
+inventory.add_listener(supervisor.nudge)
+
+# Measurement jobs run on a dedicated worker thread per reader; results of
+# keyed submissions are kept for retries for BYONOY_MCP_IDEMPOTENCY_TTL seconds
+jobs = JobManager(key_ttl=float(os.environ.get("BYONOY_MCP_IDEMPOTENCY_TTL", "3600")))
+
+# Telemetry snapshots shared by all clients polling the same reader
+snapshots = SnapshotCache(ttl=float(os.environ.get("BYONOY_MCP_SNAPSHOT_TTL", "2.0")))
+
+# Background temperature/humidity/uptime history for every reader
+sampler = EnvironmentSampler(
+    pool.all,
+    interval=float(os.environ.get("BYONOY_MCP_SAMPLE_INTERVAL", "30")),
+    capacity=int(os.environ.get("BYONOY_MCP_SAMPLE_CAPACITY", "8640")),
+)
+
+# Every successful plate read is appended here; an empty path disables the store
+_store_path = os.environ.get(
+    "BYONOY_MCP_STORE_DIR", os.path.join(os.path.expanduser("~"), ".byonoy-mcp", "measurements")
+)
+store = MeasurementStore(_store_path) if _store_path else None
+
+def _open_store() -> Optional[MeasurementStore]:
+    """The measurement store, opened on first use. A store that cannot be opened is disabled."""
+    global store
+    if store is not None:
+        try:
+            store.open()
+        except OSError:
+            logger.exception("Cannot open the measurement store in %s, disabling it", store.path)
+            store = None
+    return store
+
+# FAST signal below which ADAPTIVE measurements re-read a well in SENSITIVE mode
+ADAPTIVE_THRESHOLD = float(os.environ.get("BYONOY_MCP_ADAPTIVE_THRESHOLD", "1000"))
+
+# Seconds a passed pre-flight check made by measure stays valid for its job,
+# if nothing else used the reader in between; 0 always checks again in the job
+PREFLIGHT_REUSE = float(os.environ.get("BYONOY_MCP_PREFLIGHT_REUSE", "2"))
+
+# Named well selections; an empty path keeps them in memory only
+layouts = LayoutStore(
+    os.environ.get("BYONOY_MCP_LAYOUTS_FILE", os.path.join(os.path.expanduser("~"), ".byonoy-mcp", "layouts.json"))
+    or None
+)
+
+# Background connect started by --auto-connect; early tool calls wait for it
+_auto_connect: Dict[str, Optional[threading.Thread]] = {"thread": None}
+AUTO_CONNECT_WAIT = float(os.environ.get("BYONOY_MCP_AUTO_CONNECT_WAIT", "30"))
+
+# Where reader handles live: in this process ("thread") or one worker process
+# per reader ("process"), see workers.py
+WORKER_MODES = ("thread", "process")
+execution: Dict[str, str] = {"workers": os.environ.get("BYONOY_MCP_WORKERS", "thread")}
+
+# Static information that does not change while devices are connected
+static_info: Dict[str, Any] = {
+    "library_version": None,
 }
 
-def _ensure_device_connected() -> Optional[str]:
-    """Helper function to check for a device connection."""
-    if device_state["handle"] is None:
-        return "Error: Device not connected. Please connect first."
-    return None
+def _get_device(serial: Optional[str] = None) -> Tuple[Optional[Device], Optional[str]]:
+    """
+    Helper function to look up a connected device.
+    Without a serial number, the first connected device is used.
+    """
+    _wait_for_auto_connect()
+    if len(pool) == 0:
+        return None, "Error: Device not connected. Please connect first."
+    device = pool.first() if serial is None else pool.get(serial)
+    if device is None:
+        return None, f"Error: No connected device with serial number {serial}."
+    return device, None
+
+# Name of each measurement capability in error messages
+MEASUREMENT_NAMES = {Capability.LUM96: "Lum96 luminescence", Capability.ABS96: "Abs96 absorbance"}
+
+def _pick_device(
+    serial: Optional[str] = None, capability: Capability = Capability.LUM96
+) -> Tuple[Optional[Device], Optional[str]]:
+    """
+    Helper function to choose the reader for a measurement of the given kind.
+    Without a serial number, an idle reader is preferred, otherwise the one
+    with the shortest queue.
+    """
+    _wait_for_auto_connect()
+    if serial is not None:
+        device, error = _get_device(serial)
+        if device is not None and not device.supports(capability):
+            return None, f"Error: Device {serial} does not support {MEASUREMENT_NAMES[capability]} measurements."
+        return device, error
+    if len(pool) == 0:
+        return None, "Error: Device not connected. Please connect first."
+    device = pool.least_busy(lambda d: jobs.pending_count(d.serial), capability)
+    if device is None:
+        return None, f"Error: No connected device supports {MEASUREMENT_NAMES[capability]} measurements."
+    return device, None
+
+def _wait_for_auto_connect() -> None:
+    """Blocks while the background connect of --auto-connect is still opening readers."""
+    thread = _auto_connect["thread"]
+    if thread is not None and thread.is_alive() and thread is not threading.current_thread():
+        thread.join(AUTO_CONNECT_WAIT)
+
+def start_auto_connect() -> threading.Thread:
+    """
+    Enumerates and opens all readers in a background thread, so that this
+    overlaps with the MCP handshake instead of delaying the first tool call.
+    """
+    def run() -> None:
+        try:
+            with connection_lock:
+                result = _connect_all()
+        except Exception:
+            logger.exception("Auto-connect failed")
+            return
+        if isinstance(result, str):
+            logger.warning("Auto-connect: %s", result)
+        else:
+            logger.info("Auto-connect: connected %s", ", ".join(result["devices"]))
 
-@mcp.tool()
+    thread = threading.Thread(target=run, name="byonoy-auto-connect", daemon=True)
+    _auto_connect["thread"] = thread
+    thread.start()
+    return thread
+
+@tool()
 def get_library_version() -> Dict[str, int]:
     """Gets the Byonoy library version."""
-    version = byonoy.library_version()
-    return {
-        "major": version.major,
-        "minor": version.minor,
-        "patch": version.patch
-    }
+    if static_info["library_version"] is None:
+        version = sdk.library_version()
+        static_info["library_version"] = {
+            "major": version.major,
+            "minor": version.minor,
+            "patch": version.patch
+        }
+    return static_info["library_version"]
 
-@mcp.tool()
-def connect_device() -> str:
+@tool()
+def connect_device() -> Any:
     """
-    Finds and connects to the first available Lum96-compatible device.
+    Finds and connects to every available Lum96 or Abs96 device.
+    Devices that are already connected are left as they are.
     """
-    if device_state["handle"] is not None:
-        return "Error: A device is already connected."
+    with connection_lock:
+        return _connect_all()
 
-    if byonoy.available_devices_count() == 0:
+def _connect_all() -> Any:
+    inventory.start()
+    attached = inventory.current()
+    if not attached:
         return "Error: No Byonoy devices found."
 
-    devices = byonoy.available_devices()
-    for device_dict in devices:
-        result_code, handle = byonoy.open_device(device_dict)
-        if result_code == byonoy.ErrorCode.NO_ERROR:
-            if byonoy.lum96_measurement_supported(handle):
-                device_state["handle"] = handle
-                res_code, dev_info = byonoy.get_device_information(handle)
-                if res_code == byonoy.ErrorCode.NO_ERROR:
-                    device_state["info"] = {
-                        "sn": dev_info.sn,
-                        "ref_no": dev_info.ref_no,
-                        "version": dev_info.version,
-                        "type": dev_info.type,
-                    }
-                    return f"Lum96 device connected successfully. Info: {device_state['info']}"
-                else:
-                    byonoy.free_device(handle)
-                    device_state["handle"] = None
-                    return f"Error: Failed to get device information: {res_code}"
-            else:
-                byonoy.free_device(handle)
-    
-    return "Error: No Lum96-compatible device found."
+    connected = []
+    errors = []
+    for entry in attached:
+        if entry.serial in pool:
+            continue
+        known = entry.known
+        if known is not None and not known[0] & Capability.MEASUREMENTS:
+            continue
+        if execution["workers"] == "process":
+            device, error = open_worker_device(entry.serial, known)
+        else:
+            device, error = open_device(entry.available, known)
+        if error is not None:
+            errors.append(error)
+        if device is None:
+            if error is None:
+                inventory.remember(entry.serial, Capability.NONE, {})
+            continue
+        inventory.remember(device.serial, device.capabilities, device.info)
+        supervisor.watch(device)
+        pool.add(device)
+        connected.append(device.info)
+
+    get_library_version()
+    if connected:
+        sampler.start()
+    if not connected and len(pool) == 0:
+        if errors:
+            return "Error: " + " ".join(errors)
+        return "Error: No Lum96 or Abs96 device found."
+    return {
+        "connected": connected,
+        "errors": errors,
+        "devices": [device.serial for device in pool.all()],
+    }
 
-@mcp.tool()
-def disconnect_device() -> str:
+def _disconnect(device: Device) -> None:
+    pool.remove(device.serial)
+    supervisor.forget(device.serial)
+    jobs.release_worker(device.serial)
+    snapshots.invalidate(device.serial)
+    sampler.forget(device.serial)
+    with device.lock.lane(BULK):
+        device.close()
+    device.capabilities = Capability.NONE
+    device.abs96_setup = None
+    if len(pool) == 0:
+        static_info["library_version"] = None
+
+@tool()
+def disconnect_device(serial: Optional[str] = None) -> str:
     """
-    Disconnects the currently connected device.
+    Disconnects the device with the given serial number, or all devices if no
+    serial number is given.
     """
-    error = _ensure_device_connected()
+    with connection_lock:
+        return _disconnect_devices(serial)
+
+def _disconnect_devices(serial: Optional[str]) -> str:
+    if serial is None:
+        if len(pool) == 0:
+            return "Error: Device not connected. Please connect first."
+        if jobs.pending_count():
+            return "Error: Measurement jobs are still pending. Wait for them to finish first."
+        for device in pool.all():
+            _disconnect(device)
+        return "All devices disconnected successfully."
+
+    device, error = _get_device(serial)
     if error:
         return error
-    
-    byonoy.free_device(device_state["handle"])
-    device_state["handle"] = None
-    device_state["info"] = None
-    return "Device disconnected successfully."
+    if jobs.pending_count(device.serial):
+        return "Error: Measurement jobs are still pending. Wait for them to finish first."
+    _disconnect(device)
+    return f"Device {serial} disconnected successfully."
 
-@mcp.tool()
-def get_device_info() -> Any:
+@tool()
+def list_devices() -> Any:
     """
-    Gets information of the connected device.
+    Lists the connected devices, the number of pending jobs on each, the
+    state of their command lanes and their connection history.
     """
-    error = _ensure_device_connected()
+    _wait_for_auto_connect()
+    return [
+        {
+            "serial": device.serial,
+            "info": device.info,
+            "capabilities": device.capability_names(),
+            "pending_jobs": jobs.pending_count(device.serial),
+            "lanes": device.lock.state(),
+            "connection": supervisor.state(device.serial),
+        }
+        for device in pool.all()
+    ]
+
+@tool()
+def list_attached_devices() -> Any:
+    """
+    Lists every reader attached to the host, connected or not, from the
+    device inventory. Capabilities are shown for readers opened before.
+    """
+    return _inventory_list()
+
+@tool()
+def get_device_info(serial: Optional[str] = None) -> Any:
+    """
+    Gets information of a connected device.
+    """
+    device, error = _get_device(serial)
     if error:
         return error
-    return device_state["info"]
+    return {**device.info, "capabilities": device.capability_names()}
+
+def _with_age(data: Dict[str, Any], age: Optional[float]) -> Dict[str, Any]:
+    """Helper function to flag values served from cache while the device is busy."""
+    if age is not None:
+        data.update({"cached": True, "age_seconds": age, "device_busy": True})
+    return data
 
-@mcp.tool()
-def get_device_status() -> Any:
+def _busy(key: str) -> Dict[str, Any]:
+    """Helper function for a reading of a busy device that has no cached value yet."""
+    return {key: None, "cached": False, "age_seconds": None, "device_busy": True}
+
+@tool()
+def get_device_status(serial: Optional[str] = None) -> Any:
     """
-    Gets the status of the connected device.
+    Gets the status of a connected device.
+    While a measurement is running, the last known value is returned with
+    'cached', 'age_seconds' and 'device_busy' set, or null if there is none
+    yet. The same applies to all get_device_* readings.
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    result_code, device_status = byonoy.get_device_status(handle)
-    if result_code != byonoy.ErrorCode.NO_ERROR:
+    result, age = device.read("get_device_status")
+    if result is None:
+        return _busy("status")
+    result_code, device_status = result
+    if result_code != sdk.ErrorCode.NO_ERROR:
         return f"Error: Failed to get device status: {result_code}"
-    return {"status": str(device_status)}
+    return _with_age({"status": str(device_status)}, age)
 
-@mcp.tool()
-def get_device_error() -> Any:
+@tool()
+def get_device_error(serial: Optional[str] = None) -> Any:
     """
-    Gets the last error of the connected device.
+    Gets the last error of a connected device.
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    result_code, device_error = byonoy.get_device_error(handle)
-    if result_code != byonoy.ErrorCode.NO_ERROR:
+    result, age = device.read("get_device_error")
+    if result is None:
+        return _busy("error")
+    result_code, device_error = result
+    if result_code != sdk.ErrorCode.NO_ERROR:
         return f"Error: Failed to get device error: {result_code}"
-    return {"error": str(device_error)}
+    return _with_age({"error": str(device_error)}, age)
 
-@mcp.tool()
-def get_device_uptime() -> Any:
+@tool()
+def get_device_uptime(serial: Optional[str] = None) -> Any:
     """
     Gets the uptime of the device, if supported.
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    if not byonoy.device_uptime_supported(handle):
+    if not device.supports(Capability.UPTIME):
         return "Error: Uptime not supported by this device."
     
-    result_code, uptime = byonoy.get_device_uptime(handle)
-    if result_code != byonoy.ErrorCode.NO_ERROR:
+    result, age = device.read("get_device_uptime")
+    if result is None:
+        return _busy("uptime_seconds")
+    result_code, uptime = result
+    if result_code != sdk.ErrorCode.NO_ERROR:
         return f"Error: Failed to get uptime: {result_code}"
-    return {"uptime_seconds": uptime}
+    return _with_age({"uptime_seconds": uptime}, age)
 
-@mcp.tool()
-def get_device_slot_status() -> Any:
+@tool()
+def get_device_slot_status(serial: Optional[str] = None) -> Any:
     """
     Gets the device slot status, if supported.
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    if not byonoy.device_slot_status_supported(handle):
+    if not device.supports(Capability.SLOT_STATUS):
         return "Error: Slot status not supported by this device."
     
-    result_code, slot_status = byonoy.get_device_slot_status(handle)
-    if result_code != byonoy.ErrorCode.NO_ERROR:
+    result, age = device.read("get_device_slot_status")
+    if result is None:
+        return _busy("slot_status")
+    result_code, slot_status = result
+    if result_code != sdk.ErrorCode.NO_ERROR:
         return f"Error: Failed to get slot status: {result_code}"
-    return {"slot_status": str(slot_status)}
+    return _with_age({"slot_status": str(slot_status)}, age)
 
-@mcp.tool()
-def get_device_parts_aligned() -> Any:
+@tool()
+def get_device_parts_aligned(serial: Optional[str] = None) -> Any:
     """
     Gets the device parts aligned status, if supported.
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    if not byonoy.device_parts_aligned_supported(handle):
+    if not device.supports(Capability.PARTS_ALIGNED):
         return "Error: Parts aligned status not supported by this device."
     
-    result_code, parts_aligned = byonoy.get_device_parts_aligned(handle)
-    if result_code != byonoy.ErrorCode.NO_ERROR:
+    result, age = device.read("get_device_parts_aligned")
+    if result is None:
+        return _busy("parts_aligned")
+    result_code, parts_aligned = result
+    if result_code != sdk.ErrorCode.NO_ERROR:
         return f"Error: Failed to get parts aligned status: {result_code}"
-    return {"parts_aligned": parts_aligned}
+    return _with_age({"parts_aligned": parts_aligned}, age)
 
-@mcp.tool()
-def get_device_readout_orientation() -> Any:
+@tool()
+def get_device_readout_orientation(serial: Optional[str] = None) -> Any:
     """
     Gets the device readout orientation, if supported.
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    if not byonoy.device_readout_orientation_supported(handle):
+    if not device.supports(Capability.READOUT_ORIENTATION):
         return "Error: Readout orientation not supported by this device."
     
-    result_code, orientation = byonoy.get_device_readout_orientation(handle)
-    if result_code != byonoy.ErrorCode.NO_ERROR:
+    result, age = device.read("get_device_readout_orientation")
+    if result is None:
+        return _busy("readout_orientation")
+    result_code, orientation = result
+    if result_code != sdk.ErrorCode.NO_ERROR:
         return f"Error: Failed to get readout orientation: {result_code}"
-    return {"readout_orientation": str(orientation)}
+    return _with_age({"readout_orientation": str(orientation)}, age)
 
-@mcp.tool()
-def get_device_temperature() -> Any:
+@tool()
+def get_device_temperature(serial: Optional[str] = None) -> Any:
     """
     Gets the device temperature, if supported.
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    if not byonoy.device_temperature_supported(handle):
+    if not device.supports(Capability.TEMPERATURE):
         return "Error: Temperature reading not supported by this device."
     
-    result_code, temp = byonoy.get_device_temperature(handle)
-    if result_code != byonoy.ErrorCode.NO_ERROR:
+    result, age = device.read("get_device_temperature")
+    if result is None:
+        return _busy("temperature_celsius")
+    result_code, temp = result
+    if result_code != sdk.ErrorCode.NO_ERROR:
         return f"Error: Failed to get temperature: {result_code}"
-    return {"temperature_celsius": temp}
+    return _with_age({"temperature_celsius": temp}, age)
 
-@mcp.tool()
-def get_device_humidity() -> Any:
+@tool()
+def get_device_humidity(serial: Optional[str] = None) -> Any:
     """
     Gets the device humidity, if supported.
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    if not byonoy.device_humidity_supported(handle):
+    if not device.supports(Capability.HUMIDITY):
         return "Error: Humidity reading not supported by this device."
     
-    result_code, humidity = byonoy.get_device_humidity(handle)
-    if result_code != byonoy.ErrorCode.NO_ERROR:
+    result, age = device.read("get_device_humidity")
+    if result is None:
+        return _busy("relative_humidity_percent")
+    result_code, humidity = result
+    if result_code != sdk.ErrorCode.NO_ERROR:
         return f"Error: Failed to get humidity: {result_code}"
-    return {"relative_humidity_percent": humidity}
+    return _with_age({"relative_humidity_percent": humidity}, age)
 
-@mcp.tool()
-def measure(mode: str = "SENSITIVE", selected_wells: Optional[List[bool]] = None) -> Any:
+@tool()
+def get_device_snapshot(serial: Optional[str] = None, max_age_seconds: Optional[float] = None) -> Any:
     """
-    Performs a luminescence measurement on the Lum96 device.
-    'mode' can be 'SENSITIVE' or 'FAST'.
-    'selected_wells' is an optional list of 96 booleans.
+    Gets status, error, uptime, slot status, parts aligned, temperature and
+    humidity of a device in one call, each with its own timestamp.
+    Unsupported readings are left out. A cached snapshot is returned if it is
+    younger than 'max_age_seconds' (defaults to the server's snapshot TTL).
     """
-    error = _ensure_device_connected()
+    device, error = _get_device(serial)
     if error:
         return error
-    handle = device_state["handle"]
-    
-    config = byonoy.Lum96MeasurementConfig()
+    return snapshots.get(device, max_age_seconds)
+
+@tool()
+def get_environment_history(
+    serial: Optional[str] = None,
+    window_seconds: Optional[float] = None,
+    max_points: int = 500,
+) -> Any:
+    """
+    Gets the sampled temperature, humidity and uptime history of a device with
+    min/mean/max aggregates. Served from memory without any device I/O.
+    'window_seconds' limits the history to the most recent samples.
+    'max_points' downsamples the returned series.
+    """
+    device, error = _get_device(serial)
+    if error:
+        return error
+    return sampler.history(device.serial, window_seconds, max_points)
+
+@tool()
+def set_environment_sampling(interval_seconds: float) -> str:
+    """
+    Sets the background sampling interval of the environmental sensors.
+    An interval of 0 pauses sampling.
+    """
+    if interval_seconds < 0:
+        return "Error: interval_seconds must not be negative."
+    sampler.set_interval(interval_seconds)
+    return f"Environment sampling interval set to {interval_seconds} seconds."
+
+@tool()
+def preview_well_selection(selection: str) -> Any:
+    """
+    Compiles a well selection expression and shows which wells it selects.
+    Expressions: 'all', 'none', wells and rectangles ('A1', 'A1:H6'),
+    'rows B,D', 'rows A-C', 'cols 1-3', a 24-digit hex mask or '@layout'.
+    Combine terms with ';' or '+', and remove wells with 'except',
+    e.g. 'all except col 12'.
+    """
+    selected_wells, error = _compile_wells(selection)
+    if error:
+        return error
+    return describe_selection(selected_wells)
+
+@tool()
+def save_plate_layout(name: str, selection: str, description: Optional[str] = None) -> Any:
+    """
+    Saves a well selection under a name so it can be reused as '@name'
+    in any selected_wells argument. Layouts are kept across restarts.
+    """
+    try:
+        layout = layouts.save(name, selection, description)
+    except ValueError as exc:
+        return f"Error: Invalid plate layout: {exc}"
+    except OSError as exc:
+        return f"Error: Could not save plate layout: {exc}"
+    return {"name": name.lower(), **layout}
+
+@tool()
+def list_plate_layouts() -> Any:
+    """
+    Lists the saved plate layouts with their expressions and well masks.
+    """
+    return layouts.list()
+
+@tool()
+def delete_plate_layout(name: str) -> str:
+    """
+    Deletes a saved plate layout.
+    """
+    if not layouts.delete(name):
+        return f"Error: Unknown plate layout: {name}"
+    return f"Plate layout '{name.lower()}' deleted."
+
+def _compile_wells(selected_wells: Optional[WellSelection]) -> Tuple[Optional[List[bool]], Optional[str]]:
+    """Helper function to turn a selection expression or list into 96 booleans."""
+    if selected_wells is None:
+        return [True] * 96, None
+    if isinstance(selected_wells, str):
+        try:
+            return compile_selection(selected_wells, layouts.masks()), None
+        except (ValueError, OSError) as exc:
+            return None, f"Error: Invalid well selection: {exc}"
+    if len(selected_wells) != 96:
+        return None, "Error: selected_wells must be a list of 96 booleans or a selection expression."
+    return selected_wells, None
+
+def _build_lum96_config(mode: str, selected_wells: Optional[WellSelection]) -> Tuple[Any, Optional[str]]:
+    """Helper function to validate measurement options and build the config."""
+    config = sdk.Lum96MeasurementConfig()
     
     if mode.upper() == "SENSITIVE":
-        config.mode = byonoy.Lum96IntegrationMode.SENSITIVE
-    elif mode.upper() == "FAST":
-        config.mode = byonoy.Lum96IntegrationMode.FAST
+        config.mode = sdk.Lum96IntegrationMode.SENSITIVE
+    elif mode.upper() in ("FAST", "ADAPTIVE"):
+        # ADAPTIVE starts with a FAST prescan, see _run_lum96_adaptive.
+        config.mode = sdk.Lum96IntegrationMode.FAST
     else:
-        return "Error: Invalid measurement mode. Use 'SENSITIVE' or 'FAST'."
+        return None, "Error: Invalid measurement mode. Use 'SENSITIVE', 'FAST' or 'ADAPTIVE'."
         
-    if selected_wells is not None:
-        if len(selected_wells) != 96:
-            return "Error: selected_wells must be a list of 96 booleans."
-        config.selected_wells = selected_wells
+    config.selected_wells, error = _compile_wells(selected_wells)
+    if error:
+        return None, error
+    return config, None
+
+def _store_measurement(
+    device: Device, mode: str, selected_wells: List[bool], values: List[float]
+) -> Optional[int]:
+    """Appends a plate to the measurement store and returns its record ID."""
+    store = _open_store()
+    if store is None:
+        return None
+    temperature = None
+    if device.supports(Capability.TEMPERATURE):
+        result_code, temp = device.call("get_device_temperature")
+        if result_code == sdk.ErrorCode.NO_ERROR:
+            temperature = temp
+    try:
+        return store.append(device.serial, mode.upper(), list(selected_wells), values, temperature)
+    except (OSError, ValueError):
+        logger.exception("Failed to store measurement from %s", device.serial)
+        return None
+
+def _run_lum96_measurement(device: Device, mode: str, config: Any) -> Dict[str, Any]:
+    """Runs a Lum96 measurement. Called on the device worker thread."""
+    result_code, values = device.call("lum96_measure", config, lane=BULK)
+    if result_code != sdk.ErrorCode.NO_ERROR:
+        raise RuntimeError(f"Measurement failed with error: {result_code}")
+    return {
+        "measurement": values,
+        "well_mask": pack_wells(config.selected_wells).hex().upper(),
+        "record_id": _store_measurement(device, mode, config.selected_wells, values),
+    }
+
+def _run_lum96_adaptive(job: Job, device: Device, config: Any, threshold: float) -> Dict[str, Any]:
+    """
+    Runs an ADAPTIVE measurement: a FAST read of the selected wells, then a
+    SENSITIVE read of only the wells whose FAST signal is below ``threshold``.
+    Both passes hold the reader, so no other plate read slips in between.
+    """
+    selected = list(config.selected_wells)
+    with device.lock.lane(BULK):
+        result_code, values = device.call("lum96_measure", config, lane=BULK)
+        if result_code != sdk.ErrorCode.NO_ERROR:
+            raise RuntimeError(f"FAST prescan failed with error: {result_code}")
+        values = list(values)
+        dim = [s and v < threshold for s, v in zip(selected, values)]
+        modes = [("SENSITIVE" if d else "FAST") if s else None for s, d in zip(selected, dim)]
+        partial = {
+            "measurement": values,
+            "well_mask": pack_wells(selected).hex().upper(),
+            "well_modes": ["FAST" if s else None for s in selected],
+        }
+        if any(dim):
+            job.check(partial)
+            job.progress = {"pass": "SENSITIVE", "wells": sum(dim)}
+            sensitive = sdk.Lum96MeasurementConfig()
+            sensitive.mode = sdk.Lum96IntegrationMode.SENSITIVE
+            sensitive.selected_wells = dim
+            result_code, rescan = device.call("lum96_measure", sensitive, lane=BULK)
+            if result_code != sdk.ErrorCode.NO_ERROR:
+                raise RuntimeError(f"SENSITIVE pass failed with error: {result_code}")
+            values = [r if d else v for v, r, d in zip(values, rescan, dim)]
+    return {
+        "measurement": values,
+        "well_mask": pack_wells(selected).hex().upper(),
+        "well_modes": modes,
+        "threshold": threshold,
+        "sensitive_wells": sum(dim),
+        "record_id": _store_measurement(device, "ADAPTIVE", selected, values),
+    }
+
+def _check_encoding(encoding: str) -> Optional[str]:
+    if encoding not in ENCODINGS:
+        return f"Error: Invalid encoding. Use one of: {', '.join(ENCODINGS)}."
+    return None
+
+def _encode_measurement(data: Dict[str, Any], encoding: str) -> Dict[str, Any]:
+    """Helper function to re-encode the 'measurement(s)' entry of a result."""
+    if encoding == "list":
+        return data
+    selected_wells = unpack_wells(bytes.fromhex(data["well_mask"])) if "well_mask" in data else None
+    if data.get("measurement") is not None:
+        return {**data, "measurement": encode_values(data["measurement"], encoding, selected_wells)}
+    if data.get("measurements") is not None:
+        return {**data, "measurements": encode_series(data["measurements"], encoding, selected_wells)}
+    if data.get("steps") is not None:
+        return {**data, "steps": [_encode_measurement(step, encoding) for step in data["steps"]]}
+    return data
+
+def _job_view(job: Job, encoding: str = "list") -> Dict[str, Any]:
+    view = job.to_dict()
+    if isinstance(view.get("result"), dict):
+        view["result"] = _encode_measurement(view["result"], encoding)
+    return view
+
+def _deadline(deadline_seconds: Optional[float]) -> Tuple[Optional[float], Optional[str]]:
+    """Helper function to turn a relative deadline into a Unix time."""
+    if deadline_seconds is None:
+        return None, None
+    if deadline_seconds <= 0:
+        return None, "Error: deadline_seconds must be positive."
+    return time.time() + deadline_seconds, None
+
+def _not_ready_message(report: Dict[str, Any]) -> str:
+    reasons = ", ".join(f"{r['check']}: {r['reason']} ({r['detail']})" for r in report["reasons"])
+    return f"Reader not ready: {reasons}."
+
+def _refused(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Result of a measurement refused by the pre-flight check."""
+    return {"status": "refused", "error": f"Error: {_not_ready_message(report)}", "preflight": report}
+
+def _submit_measurement(
+    device: Device,
+    mode: str,
+    config: Any,
+    deadline: Optional[float] = None,
+    key: Optional[str] = None,
+    threshold: Optional[float] = None,
+    preflight: bool = False,
+    checked: Optional[Tuple[float, int]] = None,
+) -> Any:
+    """
+    Queues a Lum96 measurement. ``checked`` is (time, lock grants) of a
+    passed pre-flight check made just before. The job reuses it instead of
+    reading the reader again if it is the next to take the reader, within
+    ``PREFLIGHT_REUSE`` seconds.
+    """
+    params = {"mode": mode.upper(), "well_mask": pack_wells(config.selected_wells).hex().upper()}
+    if mode.upper() == "ADAPTIVE":
+        params["threshold"] = threshold = ADAPTIVE_THRESHOLD if threshold is None else threshold
+
+    def run(job: Job) -> Dict[str, Any]:
+        # The check and the measurement hold the reader together, so no other
+        # command runs in between. A check made by measure is reused only if
+        # no other command took the reader since.
+        with device.lock.lane(BULK):
+            reuse = (
+                checked is not None
+                and device.lock.grants == checked[1] + 1
+                and time.time() - checked[0] <= PREFLIGHT_REUSE
+            )
+            if preflight and not reuse:
+                report = check_readiness(device)
+                if not report["ready"]:
+                    raise JobStopped(JOB_FAILED, _not_ready_message(report), {"preflight": report})
+            if mode.upper() == "ADAPTIVE":
+                return _run_lum96_adaptive(job, device, config, threshold)
+            return _run_lum96_measurement(device, mode, config)
+
+    return _submit_job("lum96_measure", device, run, params, deadline, key)
+
+def _submit_job(
+    kind: str,
+    device: Device,
+    run: Any,
+    params: Dict[str, Any],
+    deadline: Optional[float] = None,
+    key: Optional[str] = None,
+) -> Any:
+    """Helper function to queue a job, at most once per idempotency key."""
+    try:
+        if key is None:
+            return jobs.submit(kind, device.serial, run, params, deadline).to_dict()
+        job, submitted = jobs.submit_once(key, kind, device.serial, run, params, deadline)
+    except (JobTableFull, KeyConflict) as exc:
+        return f"Error: {exc}"
+    view = job.to_dict()
+    if not submitted:
+        view["reused"] = True
+    return view
+
+@tool()
+def measure(
+    mode: str = "SENSITIVE",
+    selected_wells: Optional[WellSelection] = None,
+    serial: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+    idempotency_key: Optional[str] = None,
+    adaptive_threshold: Optional[float] = None,
+    preflight: bool = False,
+) -> Any:
+    """
+    Starts a luminescence measurement on a Lum96 device and returns a job ID.
+    'mode' can be 'SENSITIVE', 'FAST' or 'ADAPTIVE'. ADAPTIVE reads the plate
+    in FAST mode, then re-reads only the wells below 'adaptive_threshold'
+    in SENSITIVE mode; the result tags each well with the mode it came from.
+    'selected_wells' is a list of 96 booleans or a selection expression such as
+    'A1:H6', 'cols 1-3', 'rows B,D', a 24-digit hex mask or '@layout'
+    (see preview_well_selection).
+    'serial' selects the reader; by default any idle reader is used.
+    'deadline_seconds' drops the job if it has not started by then.
+    'idempotency_key' makes retries safe: a repeated call with the same key
+    returns the existing job, running or finished, without a new plate read.
+    'preflight' checks slot status, part alignment and the device error first.
+    On an idle reader a failed check refuses the measurement at once with
+    status 'refused' and the reasons; on a busy reader the check runs right
+    before the plate read and fails the job instead.
+    Use get_measurement_job or wait_measurement_job to retrieve the result.
+    """
+    deadline, error = _deadline(deadline_seconds)
+    if error:
+        return error
+    if adaptive_threshold is not None and adaptive_threshold < 0:
+        return "Error: adaptive_threshold must not be negative."
+    device, error = _pick_device(serial)
+    if error:
+        return error
+    config, error = _build_lum96_config(mode, selected_wells)
+    if error:
+        return error
+    checked = None
+    if (
+        preflight
+        and jobs.pending_count(device.serial) == 0
+        and (idempotency_key is None or jobs.find_key(idempotency_key) is None)
+    ):
+        with device.lock.lane(FAST):
+            report = check_readiness(device)
+            grants = device.lock.grants
+        if not report["ready"]:
+            return _refused(report)
+        checked = (report["checked_at"], grants)
+    return _submit_measurement(
+        device, mode, config, deadline, idempotency_key, adaptive_threshold, preflight, checked
+    )
+
+@tool()
+def measure_batch(
+    plates: Optional[int] = None,
+    mode: str = "SENSITIVE",
+    selected_wells: Optional[WellSelection] = None,
+    serials: Optional[List[str]] = None,
+    deadline_seconds: Optional[float] = None,
+    adaptive_threshold: Optional[float] = None,
+    preflight: bool = False,
+) -> Any:
+    """
+    Starts measurements for a batch of plates spread across readers in parallel.
+    'plates' is the number of plates to read; defaults to one per reader.
+    'serials' limits the batch to the given readers; defaults to all of them.
+    Each plate is queued on the reader with the shortest queue.
+    Plates that have not started within 'deadline_seconds' are dropped.
+    'mode', 'selected_wells', 'adaptive_threshold' and 'preflight' work as in
+    measure; with 'preflight', each plate is checked right before it is read.
+    Returns one job per plate.
+    """
+    deadline, error = _deadline(deadline_seconds)
+    if error:
+        return error
+    if adaptive_threshold is not None and adaptive_threshold < 0:
+        return "Error: adaptive_threshold must not be negative."
+    _wait_for_auto_connect()
+    if len(pool) == 0:
+        return "Error: Device not connected. Please connect first."
+    if serials is None:
+        devices = [device for device in pool.all() if device.supports(Capability.LUM96)]
+        if not devices:
+            return "Error: No connected device supports Lum96 luminescence measurements."
     else:
-        config.selected_wells = [True] * 96
+        devices = []
+        for serial in serials:
+            device, error = _pick_device(serial)
+            if error:
+                return error
+            devices.append(device)
+    if plates is None:
+        plates = len(devices)
+    if plates < 1:
+        return "Error: plates must be at least 1."
+    config, error = _build_lum96_config(mode, selected_wells)
+    if error:
+        return error
+
+    submitted = []
+    for _ in range(plates):
+        device = min(devices, key=lambda d: jobs.pending_count(d.serial))
+        submitted.append(
+            _submit_measurement(device, mode, config, deadline, threshold=adaptive_threshold, preflight=preflight)
+        )
+    return {"jobs": submitted}
+
+@tool()
+def get_measurement_job(job_id: str, encoding: str = "list") -> Any:
+    """
+    Gets the status of a measurement job, including its result once finished.
+    'encoding' selects the measurement format: 'list' (default), 'float32'
+    (base64 little-endian float32), 'matrix' (rows A-H of 12 columns) or
+    'sparse' (selected wells only, keyed by well name).
+    """
+    error = _check_encoding(encoding)
+    if error:
+        return error
+    job = jobs.get(job_id)
+    if job is None:
+        return f"Error: Unknown job ID: {job_id}"
+    return _job_view(job, encoding)
+
+@tool()
+async def wait_measurement_job(
+    job_id: str,
+    timeout_seconds: float = 60.0,
+    encoding: str = "list",
+    cancel_if_abandoned: bool = True,
+) -> Any:
+    """
+    Waits up to 'timeout_seconds' for a measurement job to finish.
+    Returns the job status, including its result once finished.
+    'encoding' selects the measurement format, as in get_measurement_job.
+    If the client cancels this request and 'cancel_if_abandoned' is set,
+    the job is cancelled too.
+    """
+    error = _check_encoding(encoding)
+    if error:
+        return error
+    job = jobs.get(job_id)
+    if job is None:
+        return f"Error: Unknown job ID: {job_id}"
+    try:
+        job = await jobs.wait(job, timeout_seconds)
+    except asyncio.CancelledError:
+        if cancel_if_abandoned:
+            jobs.cancel(job)
+        raise
+    return _job_view(job, encoding)
+
+@tool()
+def cancel_measurement_job(job_id: str) -> Any:
+    """
+    Cancels a measurement job. A queued job is dropped before it reaches the
+    reader. A running kinetic series stops before its next read and keeps the
+    reads taken so far; a single plate read in progress cannot be interrupted.
+    """
+    job = jobs.get(job_id)
+    if job is None:
+        return f"Error: Unknown job ID: {job_id}"
+    if not jobs.cancel(job):
+        return f"Error: Job {job_id} has already finished ({job.status})."
+    return job.to_dict()
 
-    result_code, values = byonoy.lum96_measure(handle, config)
+def _run_lum96_kinetic(
+    job: Job,
+    device: Device,
+    mode: str,
+    config: Any,
+    interval: float,
+    reads: int,
+    on_read: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Runs a kinetic series on the device worker thread. Read ``i`` is started
+    at ``i * interval`` seconds after the first one on the monotonic clock, so
+    a slow read does not shift the rest of the schedule. If the job is
+    cancelled or its deadline passes, the reads taken so far are kept.
+    """
+    offsets: List[float] = []
+    timestamps: List[float] = []
+    measurements: List[List[float]] = []
+    record_ids: List[Optional[int]] = []
+
+    def result() -> Dict[str, Any]:
+        return {
+            "interval_seconds": interval,
+            "offsets_seconds": offsets,
+            "timestamps": timestamps,
+            "measurements": measurements,
+            "well_mask": pack_wells(config.selected_wells).hex().upper(),
+            "record_ids": record_ids,
+        }
 
-    if result_code != byonoy.ErrorCode.NO_ERROR:
-        return f"Error: Measurement failed with error: {result_code}"
+    start = time.monotonic()
+    for i in range(reads):
+        job.sleep(start + i * interval - time.monotonic(), result())
+        offsets.append(time.monotonic() - start)
+        timestamps.append(time.time())
+        result_code, values = device.call("lum96_measure", config, lane=BULK)
+        if result_code != sdk.ErrorCode.NO_ERROR:
+            raise RuntimeError(f"Kinetic read {i + 1} of {reads} failed with error: {result_code}")
+        measurements.append(values)
+        record_ids.append(_store_measurement(device, mode, config.selected_wells, values))
+        job.progress = {"reads_done": i + 1, "reads": reads}
+        if on_read is not None:
+            on_read(i + 1)
+    return result()
+
+@tool()
+async def measure_kinetic(
+    interval_seconds: float,
+    reads: int,
+    mode: str = "FAST",
+    selected_wells: Optional[WellSelection] = None,
+    serial: Optional[str] = None,
+    wait: bool = True,
+    encoding: str = "list",
+    deadline_seconds: Optional[float] = None,
+    ctx: Context = None,
+) -> Any:
+    """
+    Runs a kinetic (time-series) luminescence measurement on the server.
+    'reads' plates are read 'interval_seconds' apart, timed by the server clock.
+    'mode', 'selected_wells' and 'serial' work as in measure.
+    Progress is reported after every read. With 'wait' (default), the call
+    returns the read x well array when the run finishes; otherwise it returns
+    the job at once. 'encoding' selects the format, as in get_measurement_job.
+    'deadline_seconds' ends the series early, keeping the reads taken so far.
+    If the client cancels a waiting call, the series is cancelled too.
+    """
+    deadline, error = _deadline(deadline_seconds)
+    if error:
+        return error
+    if mode.upper() == "ADAPTIVE":
+        return "Error: ADAPTIVE mode is not supported for kinetic runs; use 'FAST' or 'SENSITIVE'."
+    if interval_seconds < 0:
+        return "Error: interval_seconds must not be negative."
+    if reads < 1:
+        return "Error: reads must be at least 1."
+    error = _check_encoding(encoding)
+    if error:
+        return error
+    device, error = _pick_device(serial)
+    if error:
+        return error
+    config, error = _build_lum96_config(mode, selected_wells)
+    if error:
+        return error
+
+    loop = asyncio.get_running_loop()
+    progress: asyncio.Queue = asyncio.Queue()
+    try:
+        job = jobs.submit(
+            "lum96_kinetic",
+            device.serial,
+            lambda job: _run_lum96_kinetic(
+                job, device, mode, config, interval_seconds, reads,
+                lambda done: loop.call_soon_threadsafe(progress.put_nowait, (done, None)),
+            ),
+            {"mode": mode.upper(), "interval_seconds": interval_seconds, "reads": reads},
+            deadline,
+        )
+    except JobTableFull as exc:
+        return f"Error: {exc}"
+    if not wait:
+        return _job_view(job, encoding)
+    await _follow_job(job, progress, reads, ctx)
+    return _job_view(job, encoding)
+
+async def _follow_job(job: Job, progress: asyncio.Queue, total: int, ctx: Optional[Context]) -> None:
+    """
+    Waits for a job, forwarding the (done, message) updates its worker puts on
+    'progress' as MCP progress notifications. If the request is cancelled,
+    the job is cancelled too.
+    """
+    done_future = asyncio.wrap_future(job.future)
+    while not job.finished:
+        update = asyncio.ensure_future(progress.get())
+        try:
+            await asyncio.wait({update, done_future}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            update.cancel()
+            jobs.cancel(job)
+            raise
+        if update.done() and ctx is not None:
+            done, message = update.result()
+            await ctx.report_progress(done, total, message)
+        else:
+            update.cancel()
+    while not progress.empty() and ctx is not None:
+        done, message = progress.get_nowait()
+        await ctx.report_progress(done, total, message)
+
+def _wait_for_slot(job: Job, device: Device, step: ProtocolStep, partial: Dict[str, Any]) -> Dict[str, Any]:
+    """Polls the slot status until a plate is inserted or removed, depending on the step."""
+    wanted = sdk.DeviceSlotState.OCCUPIED if step.kind == "wait_for_plate" else sdk.DeviceSlotState.EMPTY
+    start = time.monotonic()
+    while True:
+        result_code, slot_status = device.call("get_device_slot_status")
+        if result_code == sdk.ErrorCode.NO_ERROR and slot_status == wanted:
+            return {"slot_status": str(slot_status), "waited_seconds": time.monotonic() - start}
+        if time.monotonic() - start >= step.options["timeout_seconds"]:
+            raise JobStopped(
+                JOB_FAILED,
+                f"{step.describe()} timed out after {step.options['timeout_seconds']} seconds"
+                f" (last slot status: {slot_status if result_code == sdk.ErrorCode.NO_ERROR else result_code}).",
+                partial,
+            )
+        job.sleep(step.options["poll_seconds"], partial)
+
+def _run_protocol(
+    job: Job,
+    device: Device,
+    steps: List[ProtocolStep],
+    configs: Dict[int, Any],
+    repeat: int,
+    on_step: Optional[Any] = None,
+) -> Dict[str, Any]:
+    """
+    Runs a protocol on the device worker thread, 'repeat' times in a row.
+    A failing step ends the run; the steps finished so far are kept.
+    """
+    records: List[Dict[str, Any]] = []
+    result = {"rounds": repeat, "steps": records}
+    total = len(steps) * repeat
+    for round_index in range(repeat):
+        for step in steps:
+            job.check(result)
+            record: Dict[str, Any] = {
+                "step": step.kind, "index": step.index, "round": round_index, "started_at": time.time(),
+            }
+            if step.kind in ("wait_for_plate", "wait_for_removal"):
+                record.update(_wait_for_slot(job, device, step, result))
+            elif step.kind == "wait":
+                job.sleep(step.options["seconds"], result)
+            elif step.kind == "record_temperature":
+                result_code, temp = device.call("get_device_temperature")
+                if result_code == sdk.ErrorCode.NO_ERROR:
+                    record["temperature_celsius"] = temp
+                else:
+                    record["error"] = f"Error: Failed to get temperature: {result_code}"
+            elif step.kind == "measure":
+                mode = step.options["mode"]
+                try:
+                    if mode.upper() == "ADAPTIVE":
+                        threshold = step.options["adaptive_threshold"]
+                        record.update(_run_lum96_adaptive(
+                            job, device, configs[step.index], ADAPTIVE_THRESHOLD if threshold is None else threshold
+                        ))
+                    else:
+                        record.update(_run_lum96_measurement(device, mode, configs[step.index]))
+                except RuntimeError as exc:
+                    raise JobStopped(JOB_FAILED, f"{step.describe()} failed: {exc}", result)
+            record["seconds"] = time.time() - record["started_at"]
+            records.append(record)
+            job.progress = {"steps_done": len(records), "steps": total, "round": round_index + 1}
+            if on_step is not None:
+                on_step(len(records), f"Round {round_index + 1}/{repeat}: {step.describe()} done")
+    return result
+
+@tool()
+async def run_protocol(
+    steps: List[Dict[str, Any]],
+    repeat: int = 1,
+    serial: Optional[str] = None,
+    wait: bool = True,
+    encoding: str = "list",
+    deadline_seconds: Optional[float] = None,
+    ctx: Context = None,
+) -> Any:
+    """
+    Runs a list of steps on one reader end to end, 'repeat' times (e.g. once
+    per plate in a stack). Each step is an object with a 'step' key:
+    - {"step": "wait_for_plate", "timeout_seconds": 600, "poll_seconds": 1}
+    - {"step": "wait_for_removal", "timeout_seconds": 600, "poll_seconds": 1}
+    - {"step": "measure", "mode": "SENSITIVE", "selected_wells": "A1:H6", "adaptive_threshold": 1000}
+    - {"step": "wait", "seconds": 60}
+    - {"step": "record_temperature"}
+    Progress is reported after every step. With 'wait' (default), the call
+    returns the step results when the run finishes; otherwise it returns the
+    job at once. 'encoding' and 'deadline_seconds' work as in measure_kinetic.
+    A failed step ends the run and keeps the results of the steps before it.
+    """
+    try:
+        parsed = parse_protocol(steps, repeat)
+    except ValueError as exc:
+        return f"Error: Invalid protocol: {exc}"
+    deadline, error = _deadline(deadline_seconds)
+    if error:
+        return error
+    error = _check_encoding(encoding)
+    if error:
+        return error
+    device, error = _pick_device(serial)
+    if error:
+        return error
+    configs = {}
+    for step in parsed:
+        if step.kind in ("wait_for_plate", "wait_for_removal") and not device.supports(Capability.SLOT_STATUS):
+            return f"Error: Invalid protocol: {step.describe()} needs slot status, which this device does not support."
+        if step.kind == "record_temperature" and not device.supports(Capability.TEMPERATURE):
+            return f"Error: Invalid protocol: {step.describe()} needs a temperature sensor, which this device does not have."
+        if step.kind == "measure":
+            configs[step.index], error = _build_lum96_config(step.options["mode"], step.options["selected_wells"])
+            if error:
+                return f"Error: Invalid protocol: {step.describe()}: {error[len('Error: '):]}"
+
+    loop = asyncio.get_running_loop()
+    progress: asyncio.Queue = asyncio.Queue()
+    try:
+        job = jobs.submit(
+            "protocol",
+            device.serial,
+            lambda job: _run_protocol(
+                job, device, parsed, configs, repeat,
+                lambda done, message: loop.call_soon_threadsafe(progress.put_nowait, (done, message)),
+            ),
+            {"steps": [step.kind for step in parsed], "repeat": repeat},
+            deadline,
+        )
+    except JobTableFull as exc:
+        return f"Error: {exc}"
+    if not wait:
+        return _job_view(job, encoding)
+    await _follow_job(job, progress, len(parsed) * repeat, ctx)
+    return _job_view(job, encoding)
+
+@tool()
+def get_abs96_wavelengths(serial: Optional[str] = None) -> Any:
+    """
+    Gets the wavelengths (nm) an Abs96 device can measure.
+    """
+    device, error = _get_device(serial)
+    if error:
+        return error
+    if not device.supports(Capability.ABS96_WAVELENGTHS):
+        return "Error: Abs96 wavelengths not supported by this device."
+    if "abs96_wavelengths" not in device.info:
+        result_code, wavelengths = device.call("abs96_get_available_wavelengths")
+        if result_code != sdk.ErrorCode.NO_ERROR:
+            return f"Error: Failed to get Abs96 wavelengths: {result_code}"
+        device.info["abs96_wavelengths"] = list(wavelengths)
+    return {"wavelengths": device.info["abs96_wavelengths"]}
+
+def _check_wavelengths(
+    device: Device, wavelengths: Optional[List[int]]
+) -> Tuple[Optional[List[int]], Optional[str]]:
+    """Helper function to validate wavelengths; defaults to all available ones."""
+    available = device.info.get("abs96_wavelengths")
+    if wavelengths is None:
+        if not available:
+            return None, "Error: The device did not report its wavelengths; please give 'wavelengths'."
+        return list(available), None
+    if not wavelengths:
+        return None, "Error: wavelengths must not be empty."
+    if len(set(wavelengths)) != len(wavelengths):
+        return None, "Error: wavelengths must not contain duplicates."
+    if available:
+        unknown = [w for w in wavelengths if w not in available]
+        if unknown:
+            return None, f"Error: Unsupported wavelengths {unknown}. Available: {available}."
+    return list(wavelengths), None
+
+def _abs96_config(wavelengths: List[int]) -> Any:
+    if len(wavelengths) == 1:
+        config = sdk.Abs96SingleMeasurementConfig()
+        config.sample_wavelength = wavelengths[0]
+    else:
+        config = sdk.Abs96MultipleMeasurementConfig()
+        config.sample_wavelengths = list(wavelengths)
+    return config
+
+def _initialize_abs96(device: Device, wavelengths: List[int]) -> bool:
+    """
+    Initializes the Abs96 measurement for 'wavelengths' unless the handle is
+    already set up for exactly these. Returns whether it initialized.
+    Called on the device worker thread.
+    """
+    kind = "single" if len(wavelengths) == 1 else "multiple"
+    setup = (kind, tuple(wavelengths))
+    with device.lock.lane(BULK):
+        if device.abs96_setup == setup:
+            return False
+        device.abs96_setup = None
+        result_code = device.call(f"abs96_initialize_{kind}_measurement", _abs96_config(wavelengths), lane=BULK)
+        if result_code != sdk.ErrorCode.NO_ERROR:
+            raise RuntimeError(f"Abs96 initialization failed with error: {result_code}")
+        device.abs96_setup = setup
+    return True
+
+def _wavelength_rows(values: Any, count: int) -> List[List[float]]:
+    """Normalizes a multi-wavelength result to one list of 96 values per wavelength."""
+    values = list(values)
+    if len(values) == count * 96 and not isinstance(values[0], (list, tuple)):
+        return [values[i * 96:(i + 1) * 96] for i in range(count)]
+    if len(values) == 96 and count != 96:
+        # well-major: one list of 'count' values per well
+        return [[float(well[i]) for well in values] for i in range(count)]
+    return [list(row) for row in values]
+
+def _run_abs96_measurement(device: Device, wavelengths: List[int]) -> Dict[str, Any]:
+    """Runs an Abs96 measurement, initializing first if needed. Called on the device worker thread."""
+    with device.lock.lane(BULK):
+        initialized = _initialize_abs96(device, wavelengths)
+        single = len(wavelengths) == 1
+        function = "abs96_single_measure" if single else "abs96_multiple_measure"
+        result_code, values = device.call(function, _abs96_config(wavelengths), lane=BULK)
+        if result_code != sdk.ErrorCode.NO_ERROR:
+            # The device may have lost its setup; initialize again next time.
+            device.abs96_setup = None
+            raise RuntimeError(f"Abs96 measurement failed with error: {result_code}")
+    rows = [list(values)] if single else _wavelength_rows(values, len(wavelengths))
+    record_ids = [_store_measurement(device, f"ABS{w}", [True] * 96, row) for w, row in zip(wavelengths, rows)]
+    result: Dict[str, Any] = {"wavelengths": wavelengths, "initialized": initialized}
+    if single:
+        result.update({"measurement": rows[0], "record_id": record_ids[0]})
+    else:
+        result.update({"measurements": rows, "record_ids": record_ids})
+    return result
+
+@tool()
+def initialize_absorbance(wavelengths: Optional[List[int]] = None, serial: Optional[str] = None) -> Any:
+    """
+    Initializes an Abs96 measurement for the given wavelengths (nm); defaults
+    to all available ones. One wavelength sets up a single measurement, more
+    set up a multiple measurement. measure_absorbance initializes on its own
+    when needed, so this is only required when initialization must happen at
+    a specific time, e.g. before the plate is inserted. Returns a job ID.
+    """
+    device, error = _pick_device(serial, Capability.ABS96)
+    if error:
+        return error
+    wavelengths, error = _check_wavelengths(device, wavelengths)
+    if error:
+        return error
+    return _submit_job(
+        "abs96_initialize",
+        device,
+        lambda job: {"wavelengths": wavelengths, "initialized": _initialize_abs96(device, wavelengths)},
+        {"wavelengths": wavelengths},
+    )
+
+@tool()
+def measure_absorbance(
+    wavelengths: Optional[List[int]] = None,
+    serial: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+    idempotency_key: Optional[str] = None,
+) -> Any:
+    """
+    Starts an absorbance measurement on an Abs96 device and returns a job ID.
+    'wavelengths' lists the wavelengths (nm) to read; defaults to all available.
+    The measurement is initialized only if the reader is not already set up
+    for the same wavelengths, so plates read back to back skip it.
+    One wavelength returns 'measurement' (96 values); several return
+    'measurements', one row of 96 values per wavelength.
+    'serial', 'deadline_seconds' and 'idempotency_key' work as in measure.
+    """
+    deadline, error = _deadline(deadline_seconds)
+    if error:
+        return error
+    device, error = _pick_device(serial, Capability.ABS96)
+    if error:
+        return error
+    wavelengths, error = _check_wavelengths(device, wavelengths)
+    if error:
+        return error
+    return _submit_job(
+        "abs96_measure",
+        device,
+        lambda job: _run_abs96_measurement(device, wavelengths),
+        {"wavelengths": wavelengths},
+        deadline,
+        idempotency_key,
+    )
+
+@tool()
+def query_measurements(
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+    serial: Optional[str] = None,
+    mode: Optional[str] = None,
+    limit: int = 100,
+    include_values: bool = False,
+    encoding: str = "list",
+) -> Any:
+    """
+    Searches stored measurements, newest first.
+    'start_time' and 'end_time' are Unix timestamps.
+    'serial' and 'mode' filter by reader and integration mode.
+    Set 'include_values' to also return the 96 well values of each plate,
+    in the given 'encoding' (see get_measurement_job).
+    """
+    store = _open_store()
+    if store is None:
+        return "Error: The measurement store is disabled."
+    if limit < 1:
+        return "Error: limit must be at least 1."
+    error = _check_encoding(encoding)
+    if error:
+        return error
+    records = store.query(start_time, end_time, serial, mode, limit)
+    if include_values:
+        values = store.values([r["record_id"] for r in records])
+        records = [
+            _encode_measurement({**record, "measurement": values.get(record["record_id"])}, encoding)
+            for record in records
+        ]
+    return {"count": len(records), "measurements": records}
+
+@tool()
+def get_stored_measurement(record_id: int, encoding: str = "list") -> Any:
+    """
+    Gets a stored measurement and its well values by record ID.
+    'encoding' selects the measurement format, as in get_measurement_job.
+    """
+    store = _open_store()
+    if store is None:
+        return "Error: The measurement store is disabled."
+    error = _check_encoding(encoding)
+    if error:
+        return error
+    record = store.get(record_id)
+    if record is None:
+        return f"Error: Unknown record ID: {record_id}"
+    record["measurement"] = store.values([record_id])[record_id]
+    return _encode_measurement(record, encoding)
+
+def _job_plates(label: str, result: Dict[str, Any]) -> List[Tuple[str, List[float], int]]:
+    """
+    The plates of a job result, one per measurement, wavelength, kinetic read
+    or protocol step, with the mask of the wells that were measured.
+    """
+    mask = int(result.get("well_mask", f"{ALL_WELLS:X}"), 16)
+    if result.get("measurement") is not None:
+        return [(label, result["measurement"], mask)]
+    if result.get("measurements") is not None:
+        return [(f"{label}[{i}]", row, mask) for i, row in enumerate(result["measurements"])]
+    plates = []
+    for i, step in enumerate(result.get("steps") or []):
+        plates.extend(_job_plates(f"{label}/step{i + 1}", step))
+    return plates
+
+def _load_plates(
+    job_ids: Optional[List[str]], record_ids: Optional[List[int]]
+) -> Tuple[List[str], Optional["np.ndarray"], List[bool], Optional[str]]:
+    """
+    Helper function to collect finished job results and stored plates into one
+    array. Also returns the wells measured on every plate; the others hold 0.
+    """
+    from . import analysis
+    labels: List[str] = []
+    rows: List[List[float]] = []
+    measured = ALL_WELLS
+    for job_id in job_ids or []:
+        job = jobs.get(job_id)
+        if job is None:
+            return [], None, [], f"Error: Unknown job ID: {job_id}"
+        if job.status != JOB_DONE:
+            return [], None, [], f"Error: Job {job_id} has not finished successfully (status: {job.status})."
+        for label, values, mask in _job_plates(job_id, job.result):
+            labels.append(label)
+            rows.append(values)
+            measured &= mask
+    stored = []
+    if record_ids:
+        store = _open_store()
+        if store is None:
+            return [], None, [], "Error: The measurement store is disabled."
+        try:
+            stored.append(store.value_matrix(record_ids))
+        except IndexError:
+            return [], None, [], "Error: Unknown record ID in record_ids."
+        for record_id in record_ids:
+            measured &= int(store.get(record_id)["well_mask"], 16)
+        labels.extend(f"record {record_id}" for record_id in record_ids)
+    if not labels:
+        return [], None, [], "Error: No plates to analyse. Give job_ids of finished measurements or record_ids."
+    return labels, analysis.as_plates(rows, *stored), unpack_wells(measured.to_bytes(WELLS // 8, "big")), None
+
+def _analysis_wells(
+    name: str, selection: Optional[WellSelection], minimum: int = 1
+) -> Tuple[Optional["np.ndarray"], Optional[str]]:
+    """Helper function to compile a well group argument into well indices."""
+    from . import analysis
+    selected_wells, error = _compile_wells(selection)
+    if error:
+        return None, f"{error} ({name})"
+    indices = analysis.wells(selected_wells)
+    if len(indices) < minimum:
+        return None, f"Error: {name} must select at least {minimum} well{'s' if minimum > 1 else ''}."
+    return indices, None
+
+def _blanked(plates: "np.ndarray", blank_wells: Optional[WellSelection]) -> Tuple[Optional["np.ndarray"], Optional[str]]:
+    from . import analysis
+    if blank_wells is None:
+        return plates, None
+    blank, error = _analysis_wells("blank_wells", blank_wells)
+    if error:
+        return None, error
+    return analysis.subtract_blank(plates, blank), None
+
+def _controls(
+    plates: "np.ndarray", positive_controls: WellSelection, negative_controls: WellSelection
+) -> Tuple[Optional[Tuple["np.ndarray", ...]], Optional[str]]:
+    """Helper function returning (positive mean, positive sd, negative mean, negative sd) per plate."""
+    from . import analysis
+    positive, error = _analysis_wells("positive_controls", positive_controls, 2)
+    if error:
+        return None, error
+    negative, error = _analysis_wells("negative_controls", negative_controls, 2)
+    if error:
+        return None, error
+    return (*analysis.group_stats(plates, positive), *analysis.group_stats(plates, negative)), None
+
+@tool()
+def plate_quality(
+    positive_controls: WellSelection,
+    negative_controls: WellSelection,
+    job_ids: Optional[List[str]] = None,
+    record_ids: Optional[List[int]] = None,
+    blank_wells: Optional[WellSelection] = None,
+    min_z_prime: float = 0.5,
+) -> Any:
+    """
+    Computes assay quality of finished measurement jobs and/or stored plates:
+    Z'-factor, signal-to-background and control CVs per plate, plus a summary.
+    'positive_controls' and 'negative_controls' are well selections of at
+    least 2 wells each. 'blank_wells' are averaged and subtracted from every
+    well of the plate first. Plates with a Z'-factor below 'min_z_prime'
+    fail.
+    """
+    from . import analysis
+    labels, plates, _, error = _load_plates(job_ids, record_ids)
+    if error:
+        return error
+    plates, error = _blanked(plates, blank_wells)
+    if error:
+        return error
+    controls, error = _controls(plates, positive_controls, negative_controls)
+    if error:
+        return error
+    positive_mean, positive_sd, negative_mean, negative_sd = controls
+    z = analysis.z_prime(positive_mean, positive_sd, negative_mean, negative_sd)
+    ratio = analysis.signal_to_background(positive_mean, negative_mean)
+    positive_cv = analysis.cv_percent(positive_mean, positive_sd)
+    negative_cv = analysis.cv_percent(negative_mean, negative_sd)
+    passed = analysis.at_least(z, min_z_prime)
+    return {
+        "plates": len(labels),
+        "passed": int(passed.sum()),
+        "failed": [label for label, ok in zip(labels, passed) if not ok],
+        "z_prime": analysis.summarize(z),
+        "signal_to_background": analysis.summarize(ratio),
+        "per_plate": [
+            {
+                "plate": label,
+                "z_prime": analysis.to_float(z[i]),
+                "signal_to_background": analysis.to_float(ratio[i]),
+                "positive_mean": analysis.to_float(positive_mean[i]),
+                "negative_mean": analysis.to_float(negative_mean[i]),
+                "positive_cv": analysis.to_float(positive_cv[i]),
+                "negative_cv": analysis.to_float(negative_cv[i]),
+            }
+            for i, label in enumerate(labels)
+        ],
+    }
+
+@tool()
+def normalize_plates(
+    positive_controls: WellSelection,
+    negative_controls: WellSelection,
+    job_ids: Optional[List[str]] = None,
+    record_ids: Optional[List[int]] = None,
+    sample_wells: Optional[WellSelection] = None,
+    blank_wells: Optional[WellSelection] = None,
+    hit_threshold: float = 50.0,
+) -> Any:
+    """
+    Normalizes the sample wells of finished measurement jobs and/or stored
+    plates to percent of control (0 = negative control mean, 100 = positive
+    control mean) and summarizes them per plate, listing the wells at or
+    above 'hit_threshold' percent as hits. 'sample_wells' defaults to every
+    well measured on all plates that is not a control or blank. 'blank_wells'
+    are subtracted first.
+    """
+    from . import analysis
+    labels, plates, measured, error = _load_plates(job_ids, record_ids)
+    if error:
+        return error
+    plates, error = _blanked(plates, blank_wells)
+    if error:
+        return error
+    controls, error = _controls(plates, positive_controls, negative_controls)
+    if error:
+        return error
+    positive_mean, _, negative_mean, _ = controls
+    if sample_wells is None:
+        excluded = [positive_controls, negative_controls] + ([blank_wells] if blank_wells is not None else [])
+        samples = analysis.other_wells(analysis.wells(measured), *[_analysis_wells("", s)[0] for s in excluded])
+        if len(samples) == 0:
+            return "Error: Every measured well is a control or blank; give sample_wells."
+    else:
+        samples, error = _analysis_wells("sample_wells", sample_wells)
+        if error:
+            return error
+    activity = analysis.normalize(plates, positive_mean, negative_mean)[:, samples]
+    hits = activity >= hit_threshold
+    return {
+        "plates": len(labels),
+        "sample_wells": len(samples),
+        "hits": int(hits.sum()),
+        "activity_percent": analysis.summarize(activity),
+        "per_plate": [
+            {
+                "plate": label,
+                **analysis.summarize(activity[i]),
+                "hits": analysis.well_names(samples[hits[i]]),
+            }
+            for i, label in enumerate(labels)
+        ],
+    }
+
+@tool()
+def replicate_cv(
+    groups: Dict[str, WellSelection],
+    job_ids: Optional[List[str]] = None,
+    record_ids: Optional[List[int]] = None,
+    blank_wells: Optional[WellSelection] = None,
+    max_cv: float = 20.0,
+) -> Any:
+    """
+    Computes the coefficient of variation (percent) of replicate well groups
+    on finished measurement jobs and/or stored plates. 'groups' maps a group
+    name to a well selection of at least 2 wells, e.g. {"cmpd1": "A1:A3"}.
+    For each group the mean signal and CV are summarized across plates and
+    the plates whose CV exceeds 'max_cv' are listed. 'blank_wells' are
+    subtracted first.
+    """
+    from . import analysis
+    if not groups:
+        return "Error: Give at least one replicate group."
+    labels, plates, _, error = _load_plates(job_ids, record_ids)
+    if error:
+        return error
+    plates, error = _blanked(plates, blank_wells)
+    if error:
+        return error
+    summary = {}
+    for name, selection in groups.items():
+        group, error = _analysis_wells(f"group '{name}'", selection, 2)
+        if error:
+            return error
+        mean, sd = analysis.group_stats(plates, group)
+        cv = analysis.cv_percent(mean, sd)
+        over = ~(cv <= max_cv)
+        summary[name] = {
+            "wells": len(group),
+            "mean": analysis.summarize(mean),
+            "cv_percent": analysis.summarize(cv),
+            "plates_over_max_cv": [label for label, bad in zip(labels, over) if bad],
+        }
+    return {"plates": len(labels), "groups": summary}
 
-    return {"measurement": values}
+# CLI transport name -> FastMCP transport
+TRANSPORTS = {"stdio": "stdio", "http": "streamable-http"}
 
 def main():
     """Entry point for the MCP server."""
-    mcp.run(transport="stdio")
+    parser = argparse.ArgumentParser(prog="byonoy-mcp", description="MCP server for Byonoy Lum96 readers.")
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default=os.environ.get("BYONOY_MCP_BACKEND", "byonoy"),
+        help="Reader SDK backend: the real byonoy_devices SDK or the simulator.",
+    )
+    parser.add_argument(
+        "--prometheus-file",
+        default=os.environ.get("BYONOY_MCP_PROMETHEUS_FILE"),
+        help="Write metrics in Prometheus text format to this file for the node exporter.",
+    )
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=os.environ.get("BYONOY_MCP_TRANSPORT", "stdio"),
+        help="stdio: one server per client. http: one shared server for many clients (streamable HTTP).",
+    )
+    parser.add_argument("--host", default=os.environ.get("BYONOY_MCP_HOST", "127.0.0.1"), help="HTTP bind address.")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("BYONOY_MCP_PORT", "8000")), help="HTTP port.")
+    parser.add_argument(
+        "--auto-connect",
+        action="store_true",
+        default=os.environ.get("BYONOY_MCP_AUTO_CONNECT", "").lower() in ("1", "true", "yes"),
+        help="Connect all readers in the background at startup, while the client handshake runs.",
+    )
+    parser.add_argument(
+        "--workers",
+        choices=WORKER_MODES,
+        default=os.environ.get("BYONOY_MCP_WORKERS", "thread"),
+        help="thread: drive readers from this process. process: one worker process per reader.",
+    )
+    args = parser.parse_args()
+    sdk.use(args.backend)
+    execution["workers"] = args.workers
+    inventory.start()
+    if args.prometheus_file:
+        registry.start_prometheus_writer(args.prometheus_file)
+    if args.auto_connect:
+        start_auto_connect()
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    mcp.run(transport=TRANSPORTS[args.transport])
 
 if __name__ == "__main__":
     main()
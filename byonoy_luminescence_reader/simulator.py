@@ -0,0 +1,430 @@
+"""
+Simulated Byonoy reader backend.
+
+Implements the subset of the ``byonoy_devices`` API used by the server so that
+the server can be developed and benchmarked without a reader attached. The
+simulator models:
+
+- per-mode integration time for ``lum96_measure``,
+- Abs96 readers with measurement initialization and per-wavelength read time,
+- USB round-trip latency with jitter for every call,
+- any number of attached devices,
+- random and targeted error injection, and devices dropping off the bus.
+
+All times are multiplied by ``time_scale`` so that long runs can be replayed
+quickly. Configuration is read from ``BYONOY_SIM_*`` environment variables by
+``SimulatedBackend.from_env``.
+"""
+
+import enum
+import math
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+class ErrorCode(enum.Enum):
+    NO_ERROR = 0
+    INVALID_ARGUMENT = 1
+    DEVICE_NOT_FOUND = 2
+    DEVICE_BUSY = 3
+    USB_ERROR = 4
+    TIMEOUT = 5
+    MEASUREMENT_FAILED = 6
+
+
+class DeviceTypes(enum.Enum):
+    Absorbance96 = 0
+    Luminescence96 = 1
+
+
+class DeviceState(enum.Enum):
+    OK = 0
+    BUSY = 1
+    ERROR = 2
+
+
+class DeviceSlotState(enum.Enum):
+    EMPTY = 0
+    OCCUPIED = 1
+    UNKNOWN = 2
+
+
+class Lum96IntegrationMode(enum.Enum):
+    SENSITIVE = 0
+    FAST = 1
+
+
+class Lum96MeasurementConfig:
+    def __init__(self):
+        self.mode = Lum96IntegrationMode.SENSITIVE
+        self.selected_wells = [True] * 96
+
+
+class Abs96SingleMeasurementConfig:
+    def __init__(self):
+        self.sample_wavelength = 0
+
+
+class Abs96MultipleMeasurementConfig:
+    def __init__(self):
+        self.sample_wavelengths: List[int] = []
+
+
+# Filter wavelengths (nm) of a simulated Abs96 reader
+ABS96_WAVELENGTHS = [450, 560, 605, 650]
+
+
+@dataclass
+class LibraryVersion:
+    major: int
+    minor: int
+    patch: int
+
+
+@dataclass
+class AvailableDevice:
+    type: DeviceTypes
+    sn: str
+    vid: int
+    pid: int
+
+
+@dataclass
+class DeviceInformation:
+    type: DeviceTypes
+    ref_no: str
+    version: str
+    sn: str
+
+
+@dataclass
+class SimulatedDevice:
+    """State of one simulated reader."""
+
+    sn: str
+    type: DeviceTypes = DeviceTypes.Luminescence96
+    attached: bool = True
+    slot: DeviceSlotState = DeviceSlotState.OCCUPIED
+    parts_aligned: bool = True
+    humidity_supported: bool = True
+    booted_at: float = field(default_factory=time.monotonic)
+    # wavelengths of the last Abs96 measurement initialization
+    abs96_initialized: Optional[Tuple[int, ...]] = None
+    # function name -> list of error codes to return on the next calls
+    faults: Dict[str, List[ErrorCode]] = field(default_factory=dict)
+
+
+class SimulatedBackend:
+    """
+    Drop-in replacement for the ``byonoy_devices`` module.
+
+    ``sensitive_seconds`` and ``fast_seconds`` are the integration times of a
+    full plate; reading fewer wells does not shorten them. ``usb_latency`` is
+    the mean round trip of every other call. ``error_rate`` is the probability
+    that any device call fails with ``ErrorCode.USB_ERROR``.
+
+    ``abs_devices`` Abs96 readers are added after the Lum96 ones. Initializing
+    an Abs96 measurement takes ``abs_init_seconds``; reading a plate takes
+    ``abs_seconds`` per wavelength and fails unless the same wavelengths were
+    initialized before.
+    """
+
+    ErrorCode = ErrorCode
+    DeviceTypes = DeviceTypes
+    DeviceState = DeviceState
+    DeviceSlotState = DeviceSlotState
+    Lum96IntegrationMode = Lum96IntegrationMode
+    Lum96MeasurementConfig = Lum96MeasurementConfig
+    Abs96SingleMeasurementConfig = Abs96SingleMeasurementConfig
+    Abs96MultipleMeasurementConfig = Abs96MultipleMeasurementConfig
+
+    def __init__(
+        self,
+        devices: int = 1,
+        sensitive_seconds: float = 20.0,
+        fast_seconds: float = 2.0,
+        usb_latency: float = 0.002,
+        error_rate: float = 0.0,
+        time_scale: float = 1.0,
+        seed: Optional[int] = None,
+        abs_devices: int = 0,
+        abs_init_seconds: float = 10.0,
+        abs_seconds: float = 3.0,
+    ):
+        self.sensitive_seconds = sensitive_seconds
+        self.abs_init_seconds = abs_init_seconds
+        self.abs_seconds = abs_seconds
+        self.fast_seconds = fast_seconds
+        self.usb_latency = usb_latency
+        self.error_rate = error_rate
+        self.time_scale = time_scale
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._devices: Dict[str, SimulatedDevice] = {}
+        self._handles: Dict[int, str] = {}
+        self._next_handle = 1
+        for i in range(devices):
+            self.add_device(f"SIM{i + 1:05d}")
+        for i in range(abs_devices):
+            self.add_device(f"SIMA{i + 1:04d}", DeviceTypes.Absorbance96)
+
+    @classmethod
+    def from_env(cls) -> "SimulatedBackend":
+        env = os.environ
+        seed = env.get("BYONOY_SIM_SEED")
+        return cls(
+            devices=int(env.get("BYONOY_SIM_DEVICES", "1")),
+            sensitive_seconds=float(env.get("BYONOY_SIM_SENSITIVE_SECONDS", "20")),
+            fast_seconds=float(env.get("BYONOY_SIM_FAST_SECONDS", "2")),
+            usb_latency=float(env.get("BYONOY_SIM_USB_LATENCY_MS", "2")) / 1000,
+            error_rate=float(env.get("BYONOY_SIM_ERROR_RATE", "0")),
+            time_scale=float(env.get("BYONOY_SIM_TIME_SCALE", "1")),
+            seed=int(seed) if seed else None,
+            abs_devices=int(env.get("BYONOY_SIM_ABS96_DEVICES", "0")),
+            abs_init_seconds=float(env.get("BYONOY_SIM_ABS_INIT_SECONDS", "10")),
+            abs_seconds=float(env.get("BYONOY_SIM_ABS_SECONDS", "3")),
+        )
+
+    # Simulation control
+
+    def add_device(self, sn: str, type: DeviceTypes = DeviceTypes.Luminescence96) -> SimulatedDevice:
+        device = SimulatedDevice(sn=sn, type=type)
+        with self._lock:
+            self._devices[sn] = device
+        return device
+
+    def set_attached(self, sn: str, attached: bool) -> None:
+        """Plugs a simulated device in or pulls it off the bus."""
+        self._devices[sn].attached = attached
+
+    def set_slot(self, sn: str, occupied: bool) -> None:
+        """Inserts a plate into or removes it from the slot of a simulated device."""
+        self._devices[sn].slot = DeviceSlotState.OCCUPIED if occupied else DeviceSlotState.EMPTY
+
+    def inject_error(self, sn: str, function: str, code: ErrorCode = ErrorCode.USB_ERROR, count: int = 1) -> None:
+        """Makes the next ``count`` calls of ``function`` on device ``sn`` fail."""
+        with self._lock:
+            self._devices[sn].faults.setdefault(function, []).extend([code] * count)
+
+    # Internals
+
+    def _sleep(self, seconds: float) -> None:
+        if seconds > 0 and self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _usb(self) -> None:
+        self._sleep(self._random.uniform(0.5, 1.5) * self.usb_latency)
+
+    def _device(self, handle: int, function: str) -> Tuple[ErrorCode, Optional[SimulatedDevice]]:
+        """Resolves a handle and applies the latency and error model."""
+        self._usb()
+        with self._lock:
+            sn = self._handles.get(handle)
+            device = self._devices.get(sn) if sn is not None else None
+            if device is None:
+                return ErrorCode.INVALID_ARGUMENT, None
+            if not device.attached:
+                return ErrorCode.DEVICE_NOT_FOUND, None
+            queued = device.faults.get(function)
+            if queued:
+                return queued.pop(0), None
+        if self.error_rate and self._random.random() < self.error_rate:
+            return ErrorCode.USB_ERROR, None
+        return ErrorCode.NO_ERROR, device
+
+    def _supported(self, handle: int) -> Optional[SimulatedDevice]:
+        with self._lock:
+            sn = self._handles.get(handle)
+            return self._devices.get(sn) if sn is not None else None
+
+    # byonoy_devices API
+
+    def library_version(self) -> LibraryVersion:
+        return LibraryVersion(0, 0, 0)
+
+    def enable_logging(self, enabled: bool) -> None:
+        pass
+
+    def available_devices_count(self) -> int:
+        return len(self.available_devices())
+
+    def available_devices(self) -> List[AvailableDevice]:
+        self._usb()
+        with self._lock:
+            return [
+                AvailableDevice(type=d.type, sn=d.sn, vid=0x16D0, pid=0x1000 + d.type.value)
+                for d in self._devices.values()
+                if d.attached
+            ]
+
+    def open_device(self, device: AvailableDevice) -> Tuple[ErrorCode, int]:
+        self._usb()
+        with self._lock:
+            sim = self._devices.get(device.sn)
+            if sim is None or not sim.attached:
+                return ErrorCode.DEVICE_NOT_FOUND, 0
+            handle = self._next_handle
+            self._next_handle += 1
+            self._handles[handle] = device.sn
+            sim.abs96_initialized = None
+        return ErrorCode.NO_ERROR, handle
+
+    def free_device(self, handle: int) -> None:
+        with self._lock:
+            self._handles.pop(handle, None)
+
+    def get_device_information(self, handle: int) -> Tuple[ErrorCode, Optional[DeviceInformation]]:
+        code, device = self._device(handle, "get_device_information")
+        if device is None:
+            return code, None
+        return code, DeviceInformation(type=device.type, ref_no="SIM-" + device.type.name, version="1.0.0", sn=device.sn)
+
+    def get_device_status(self, handle: int) -> Tuple[ErrorCode, Optional[DeviceState]]:
+        code, device = self._device(handle, "get_device_status")
+        return code, DeviceState.OK if device is not None else None
+
+    def get_device_error(self, handle: int) -> Tuple[ErrorCode, int]:
+        code, device = self._device(handle, "get_device_error")
+        return code, 0
+
+    def device_uptime_supported(self, handle: int) -> bool:
+        return self._supported(handle) is not None
+
+    def get_device_uptime(self, handle: int) -> Tuple[ErrorCode, int]:
+        code, device = self._device(handle, "get_device_uptime")
+        if device is None:
+            return code, 0
+        return code, int((time.monotonic() - device.booted_at) / max(self.time_scale, 1e-9))
+
+    def device_slot_status_supported(self, handle: int) -> bool:
+        return self._supported(handle) is not None
+
+    def get_device_slot_status(self, handle: int) -> Tuple[ErrorCode, Optional[DeviceSlotState]]:
+        code, device = self._device(handle, "get_device_slot_status")
+        return code, device.slot if device is not None else None
+
+    def device_parts_aligned_supported(self, handle: int) -> bool:
+        return self._supported(handle) is not None
+
+    def get_device_parts_aligned(self, handle: int) -> Tuple[ErrorCode, bool]:
+        code, device = self._device(handle, "get_device_parts_aligned")
+        return code, device.parts_aligned if device is not None else False
+
+    def device_readout_orientation_supported(self, handle: int) -> bool:
+        return False
+
+    def device_temperature_supported(self, handle: int) -> bool:
+        return self._supported(handle) is not None
+
+    def get_device_temperature(self, handle: int) -> Tuple[ErrorCode, float]:
+        code, device = self._device(handle, "get_device_temperature")
+        if device is None:
+            return code, 0.0
+        drift = math.sin((time.monotonic() - device.booted_at) / 600)
+        return code, round(25.0 + 0.5 * drift + self._random.gauss(0, 0.05), 2)
+
+    def device_humidity_supported(self, handle: int) -> bool:
+        device = self._supported(handle)
+        return device is not None and device.humidity_supported
+
+    def get_device_humidity(self, handle: int) -> Tuple[ErrorCode, float]:
+        code, device = self._device(handle, "get_device_humidity")
+        if device is None:
+            return code, 0.0
+        return code, round(40.0 + self._random.gauss(0, 0.5), 1)
+
+    def lum96_measurement_supported(self, handle: int) -> bool:
+        device = self._supported(handle)
+        return device is not None and device.type == DeviceTypes.Luminescence96
+
+    def lum96_measure(self, handle: int, config: Lum96MeasurementConfig) -> Tuple[ErrorCode, List[float]]:
+        code, device = self._device(handle, "lum96_measure")
+        if device is None:
+            return code, []
+        if len(config.selected_wells) != 96:
+            return ErrorCode.INVALID_ARGUMENT, []
+        sensitive = config.mode == Lum96IntegrationMode.SENSITIVE
+        self._sleep(self.sensitive_seconds if sensitive else self.fast_seconds)
+        if not device.attached:
+            return ErrorCode.DEVICE_NOT_FOUND, []
+        noise = 5.0 if sensitive else 40.0
+        values = []
+        for i, selected in enumerate(config.selected_wells):
+            if not selected:
+                values.append(0.0)
+                continue
+            # A few bright wells on a dim background, like a typical assay plate.
+            signal = 1e5 if i % 12 < 2 else (1e3 if i % 12 < 6 else 50.0)
+            values.append(max(0.0, self._random.gauss(signal, noise + 0.02 * signal)))
+        return ErrorCode.NO_ERROR, values
+
+    def abs96_available_wavelengths_supported(self, handle: int) -> bool:
+        device = self._supported(handle)
+        return device is not None and device.type == DeviceTypes.Absorbance96
+
+    def abs96_measurement_supported(self, handle: int) -> bool:
+        return self.abs96_available_wavelengths_supported(handle)
+
+    def abs96_get_available_wavelengths(self, handle: int) -> Tuple[ErrorCode, List[int]]:
+        code, device = self._device(handle, "abs96_get_available_wavelengths")
+        if device is None:
+            return code, []
+        return code, list(ABS96_WAVELENGTHS)
+
+    def _abs96_initialize(self, handle: int, function: str, wavelengths: List[int]) -> ErrorCode:
+        code, device = self._device(handle, function)
+        if device is None:
+            return code
+        if not wavelengths or any(w not in ABS96_WAVELENGTHS for w in wavelengths):
+            return ErrorCode.INVALID_ARGUMENT
+        self._sleep(self.abs_init_seconds)
+        device.abs96_initialized = tuple(wavelengths)
+        return ErrorCode.NO_ERROR
+
+    def abs96_initialize_single_measurement(self, handle: int, config: Abs96SingleMeasurementConfig) -> ErrorCode:
+        return self._abs96_initialize(handle, "abs96_initialize_single_measurement", [config.sample_wavelength])
+
+    def abs96_initialize_multiple_measurement(
+        self, handle: int, config: Abs96MultipleMeasurementConfig
+    ) -> ErrorCode:
+        return self._abs96_initialize(handle, "abs96_initialize_multiple_measurement", list(config.sample_wavelengths))
+
+    def _abs96_plate(self, wavelength: int) -> List[float]:
+        # Optical densities: a dilution series across the columns, peaking near 450 nm.
+        scale = 1.0 + (650 - wavelength) / 400
+        return [
+            round(max(0.0, scale * 2.5 / 2 ** (i % 12) + 0.04 + self._random.gauss(0, 0.005)), 4)
+            for i in range(96)
+        ]
+
+    def _abs96_measure(
+        self, handle: int, function: str, wavelengths: List[int]
+    ) -> Tuple[ErrorCode, Optional[SimulatedDevice]]:
+        code, device = self._device(handle, function)
+        if device is None:
+            return code, None
+        if device.abs96_initialized != tuple(wavelengths):
+            return ErrorCode.INVALID_ARGUMENT, None
+        self._sleep(self.abs_seconds * len(wavelengths))
+        if not device.attached:
+            return ErrorCode.DEVICE_NOT_FOUND, None
+        return ErrorCode.NO_ERROR, device
+
+    def abs96_single_measure(self, handle: int, config: Abs96SingleMeasurementConfig) -> Tuple[ErrorCode, List[float]]:
+        code, device = self._abs96_measure(handle, "abs96_single_measure", [config.sample_wavelength])
+        if device is None:
+            return code, []
+        return code, self._abs96_plate(config.sample_wavelength)
+
+    def abs96_multiple_measure(
+        self, handle: int, config: Abs96MultipleMeasurementConfig
+    ) -> Tuple[ErrorCode, List[List[float]]]:
+        wavelengths = list(config.sample_wavelengths)
+        code, device = self._abs96_measure(handle, "abs96_multiple_measure", wavelengths)
+        if device is None:
+            return code, []
+        return code, [self._abs96_plate(w) for w in wavelengths]
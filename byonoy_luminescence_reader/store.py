@@ -0,0 +1,235 @@
+"""
+Persistent measurement store.
+
+Every plate read is appended to two files in the store directory:
+
+- ``values.f32``: the well values as little-endian float32, 96 per plate.
+- ``index.bin``: one fixed-size metadata record per plate (timestamp,
+  temperature, mode, device serial and selected-well bitmask). The bitmask
+  is reported as 24 hex digits.
+
+Row ``n`` of the index describes plate ``n`` in the values file. Both files are
+memory-mapped for queries, so large histories are never loaded into RAM.
+
+Nothing touches the disk until the store is first used: ``open`` creates the
+directory and drops what an interrupted append left behind, once.
+
+Several server processes may share a store directory: appends and recovery
+hold an exclusive ``flock`` on ``store.lock``, and each plate is written at
+the offset of its record ID, over anything an interrupted append left behind.
+"""
+
+import contextlib
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: appends are serialized within this process only.
+    fcntl = None
+
+from .plate import WELLS, pack_wells
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# timestamp, temperature, mode, serial, well mask
+_RECORD = struct.Struct("<dd16s32s12s4x")
+RECORD_SIZE = _RECORD.size
+VALUES_SIZE = WELLS * 4
+
+
+def _text(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("ascii", "replace")
+
+
+def _write_at(path: str, offset: int, data: bytes) -> None:
+    with open(path, "ab"):
+        pass
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+
+
+class MeasurementStore:
+    """Append-only on-disk store of plate measurements."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._values_path = os.path.join(path, "values.f32")
+        self._index_path = os.path.join(path, "index.bin")
+        self._lock_path = os.path.join(path, "store.lock")
+        self._lock = threading.Lock()
+        self._opened = False
+
+    def open(self) -> None:
+        """
+        Creates the store directory and recovers from interrupted appends on
+        first use; later calls do nothing. Raises OSError if the directory
+        cannot be created or written.
+        """
+        if self._opened:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with self._locked():
+            if not self._opened:
+                self._recover()
+                self._opened = True
+
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self._index_path) // RECORD_SIZE
+        except FileNotFoundError:
+            return 0
+
+    def append(
+        self,
+        serial: str,
+        mode: str,
+        selected_wells: List[bool],
+        values: List[float],
+        temperature: Optional[float] = None,
+        timestamp: Optional[float] = None,
+    ) -> int:
+        """Stores one plate and returns its record ID."""
+        if len(values) != WELLS:
+            raise ValueError(f"Expected {WELLS} values, got {len(values)}.")
+        data = array("f", values)
+        if sys.byteorder == "big":
+            data.byteswap()
+        record = _RECORD.pack(
+            time.time() if timestamp is None else timestamp,
+            math.nan if temperature is None else temperature,
+            mode.encode("ascii")[:16],
+            serial.encode("ascii", "replace")[:32],
+            pack_wells(selected_wells),
+        )
+        self.open()
+        with self._locked():
+            record_id = len(self)
+            # The values are written first; the index record commits the plate.
+            _write_at(self._values_path, record_id * VALUES_SIZE, data.tobytes())
+            _write_at(self._index_path, record_id * RECORD_SIZE, record)
+        return record_id
+
+    def query(
+        self,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        serial: Optional[str] = None,
+        mode: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the metadata of matching plates, newest first.
+        """
+        matches = []
+        for record in self._scan_index(reverse=True):
+            if start_time is not None and record["timestamp"] < start_time:
+                continue
+            if end_time is not None and record["timestamp"] > end_time:
+                continue
+            if serial is not None and record["serial"] != serial:
+                continue
+            if mode is not None and record["mode"] != mode.upper():
+                continue
+            matches.append(record)
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def get(self, record_id: int) -> Optional[Dict[str, Any]]:
+        """Returns the metadata of one plate, or None if it does not exist."""
+        if record_id < 0 or record_id >= len(self):
+            return None
+        with open(self._index_path, "rb") as f:
+            f.seek(record_id * RECORD_SIZE)
+            return self._decode(record_id, f.read(RECORD_SIZE))
+
+    def values(self, record_ids: List[int]) -> Dict[int, List[float]]:
+        """Reads the well values of the given plates from the mapped values file."""
+        result: Dict[int, List[float]] = {}
+        count = len(self)
+        if not record_ids or count == 0:
+            return result
+        with open(self._values_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for record_id in record_ids:
+                if 0 <= record_id < count:
+                    data = array("f")
+                    data.frombytes(mm[record_id * VALUES_SIZE:(record_id + 1) * VALUES_SIZE])
+                    if sys.byteorder == "big":
+                        data.byteswap()
+                    result[record_id] = data.tolist()
+        return result
+
+    def value_matrix(self, record_ids: List[int]) -> "np.ndarray":
+        """
+        Reads the well values of the given plates as a (plates, 96) float64
+        array, in the order given. Raises IndexError for unknown record IDs.
+        """
+        import numpy as np
+
+        count = len(self)
+        ids = np.asarray(record_ids, dtype=np.int64)
+        if ids.size and (ids.min() < 0 or ids.max() >= count):
+            raise IndexError("Unknown record ID.")
+        if not ids.size:
+            return np.empty((0, WELLS))
+        values = np.memmap(self._values_path, dtype="<f4", mode="r", shape=(count, WELLS))
+        return values[ids].astype(np.float64)
+
+    def _scan_index(self, reverse: bool = False) -> Iterator[Dict[str, Any]]:
+        count = len(self)
+        if count == 0:
+            return
+        with open(self._index_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            rows = range(count - 1, -1, -1) if reverse else range(count)
+            for record_id in rows:
+                offset = record_id * RECORD_SIZE
+                yield self._decode(record_id, mm[offset:offset + RECORD_SIZE])
+
+    @staticmethod
+    def _decode(record_id: int, raw: bytes) -> Dict[str, Any]:
+        timestamp, temperature, mode, serial, mask = _RECORD.unpack(raw)
+        return {
+            "record_id": record_id,
+            "timestamp": timestamp,
+            "temperature_celsius": None if math.isnan(temperature) else temperature,
+            "mode": _text(mode),
+            "serial": _text(serial),
+            "well_mask": mask.hex().upper(),
+        }
+
+    @contextlib.contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Excludes other threads and, through the lock file, other processes."""
+        with self._lock:
+            with open(self._lock_path, "ab") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _recover(self) -> None:
+        """
+        Drops partially written plates left behind by an interrupted append.
+        Callers hold the store lock.
+        """
+        count = len(self)
+        if os.path.exists(self._index_path) and os.path.getsize(self._index_path) != count * RECORD_SIZE:
+            with open(self._index_path, "r+b") as f:
+                f.truncate(count * RECORD_SIZE)
+        if os.path.exists(self._values_path) and os.path.getsize(self._values_path) > count * VALUES_SIZE:
+            with open(self._values_path, "r+b") as f:
+                f.truncate(count * VALUES_SIZE)
@@ -0,0 +1,203 @@
+"""
+Connection supervision.
+
+When an SDK call on a connected reader fails with a result code that means
+the handle is gone (the reader dropped off the USB bus), the supervisor
+reopens the same serial number in the background, retrying with exponential
+backoff until the reader is back or it is disconnected. The lost handle is
+freed once when recovery starts; until a new one is open, calls on the
+device fail with ``ConnectionFault.HANDLE_LOST`` without reaching the SDK.
+The new handle replaces the old one inside the same ``Device``, which keeps
+its cached capabilities and information, so queued jobs and clients carry on
+without a manual disconnect/connect cycle.
+
+Read-only ``get_device_*`` calls that hit a lost handle wait for the
+reconnect and are retried once (see ``Device.call``). Measurements are not
+retried, since reading a plate twice is not harmless.
+
+Downtime (fault to recovered) and reconnect latency (the successful reopen)
+are recorded per reader in the ``connection`` metrics group.
+
+Which SDK ``ErrorCode`` members count as a lost connection is configured by
+name with ``BYONOY_MCP_CONNECTION_FAULTS``; names the loaded SDK does not
+define are reported once and ignored.
+"""
+
+import enum
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .backend import sdk
+from .devices import ConnectionFault, Device
+from .inventory import DEVICE_ADDED, InventoryEntry
+from .metrics import registry
+from .scheduler import BULK
+
+logger = logging.getLogger(__name__)
+
+# Names of the SDK result codes that mean the handle no longer reaches the reader
+CONNECTION_FAULTS = tuple(
+    name.strip()
+    for name in os.environ.get("BYONOY_MCP_CONNECTION_FAULTS", "DEVICE_NOT_FOUND,USB_ERROR").split(",")
+    if name.strip()
+)
+
+
+class ConnectionSupervisor:
+    """
+    Reopens readers after connection faults. ``find`` returns the enumerated
+    device for a serial number, or None while it is not attached.
+    """
+
+    def __init__(
+        self,
+        find: Callable[[str], Optional[Any]],
+        initial_backoff: float = 0.5,
+        max_backoff: float = 10.0,
+        wait: float = 10.0,
+    ):
+        self.find = find
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.wait = wait
+        self._lock = threading.Lock()
+        self._devices: Dict[str, Device] = {}
+        # serial -> set while the reader is usable, cleared during recovery
+        self._up: Dict[str, threading.Event] = {}
+        # serial -> set to cut a backoff sleep short
+        self._wake: Dict[str, threading.Event] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._checked_codes = False
+
+    @staticmethod
+    def is_fault(result: Any) -> bool:
+        """Tells whether an SDK result carries a connection fault code."""
+        if isinstance(result, tuple) and result:
+            result = result[0]
+        if isinstance(result, ConnectionFault):
+            return True
+        return isinstance(result, enum.Enum) and result.name in CONNECTION_FAULTS
+
+    def watch(self, device: Device) -> None:
+        if not self._checked_codes:
+            # The SDK is loaded once a device is open.
+            self._checked_codes = True
+            unknown = [name for name in CONNECTION_FAULTS if not hasattr(sdk.ErrorCode, name)]
+            if unknown:
+                logger.warning(
+                    "BYONOY_MCP_CONNECTION_FAULTS names unknown to the SDK: %s", ", ".join(unknown)
+                )
+        with self._lock:
+            self._devices[device.serial] = device
+            self._up[device.serial] = threading.Event()
+            self._up[device.serial].set()
+            self._wake[device.serial] = threading.Event()
+            self._stats.setdefault(device.serial, {"outages": 0, "last_outage": None})
+        device.supervisor = self
+
+    def forget(self, serial: str) -> None:
+        """Stops supervising a reader, ending any reconnect attempts."""
+        with self._lock:
+            device = self._devices.pop(serial, None)
+            up = self._up.pop(serial, None)
+            wake = self._wake.pop(serial, None)
+        if device is not None:
+            device.supervisor = None
+        if up is not None:
+            # Release reads waiting for a reconnect that will not come.
+            up.set()
+        if wake is not None:
+            wake.set()
+
+    def _watching(self, device: Device) -> bool:
+        with self._lock:
+            return self._devices.get(device.serial) is device
+
+    def report(self, device: Device, function: str, result: Any) -> None:
+        """Called by ``Device.call`` with a faulted result; starts a reconnect."""
+        with self._lock:
+            up = self._up.get(device.serial)
+            if up is None or not up.is_set() or self._devices.get(device.serial) is not device:
+                return
+            up.clear()
+            code = result[0] if isinstance(result, tuple) else result
+            stats = self._stats[device.serial]
+            stats["outages"] += 1
+            stats["down_since"] = time.time()
+            stats["last_outage"] = {"function": function, "code": str(code)}
+        logger.warning("Lost connection to %s (%s: %s), reconnecting", device.serial, function, code)
+        threading.Thread(
+            target=self._recover, args=(device,), name=f"byonoy-reconnect-{device.serial}", daemon=True
+        ).start()
+
+    def _recover(self, device: Device) -> None:
+        start = time.monotonic()
+        delay = self.initial_backoff
+        attempts = 0
+        with device.lock.lane(BULK):
+            if not self._watching(device):
+                return
+            # Free the lost handle once; calls fail fast until it is reopened.
+            device.close()
+        while True:
+            available = self.find(device.serial)
+            if available is not None:
+                attempts += 1
+                with device.lock.lane(BULK):
+                    if not self._watching(device):
+                        return
+                    reopen_start = time.monotonic()
+                    error = device.reopen(available)
+                    reopen_seconds = time.monotonic() - reopen_start
+                if error is None:
+                    break
+                logger.warning("Reconnect attempt %d for %s failed: %s", attempts, device.serial, error)
+            with self._lock:
+                wake = self._wake.get(device.serial)
+            if wake is None:
+                return
+            wake.wait(delay)
+            wake.clear()
+            if not self._watching(device):
+                return
+            delay = min(2 * delay, self.max_backoff)
+        downtime = time.monotonic() - start
+        registry.histogram("connection", f"{device.serial}:downtime").record(downtime)
+        registry.histogram("connection", f"{device.serial}:reconnect").record(reopen_seconds)
+        with self._lock:
+            stats = self._stats[device.serial]
+            stats.pop("down_since", None)
+            stats["last_outage"].update(
+                {"downtime_seconds": downtime, "reconnect_seconds": reopen_seconds, "attempts": attempts}
+            )
+            up = self._up.get(device.serial)
+        logger.info("Reconnected %s after %.2f s", device.serial, downtime)
+        if up is not None:
+            up.set()
+
+    def wait_recovered(self, device: Device) -> bool:
+        """Waits up to ``wait`` seconds for a reader to come back. Returns whether it did."""
+        with self._lock:
+            up = self._up.get(device.serial)
+        return up is not None and up.wait(self.wait) and self._watching(device)
+
+    def nudge(self, event: str, entry: InventoryEntry) -> None:
+        """Inventory listener: retries at once when a reconnecting reader is plugged back in."""
+        if event != DEVICE_ADDED:
+            return
+        with self._lock:
+            wake = self._wake.get(entry.serial)
+        if wake is not None:
+            wake.set()
+
+    def state(self, serial: str) -> Dict[str, Any]:
+        with self._lock:
+            up = self._up.get(serial)
+            stats = self._stats.get(serial, {"outages": 0, "last_outage": None})
+            return {
+                "state": "reconnecting" if up is not None and not up.is_set() else "connected",
+                **{k: (dict(v) if isinstance(v, dict) else v) for k, v in stats.items()},
+            }
@@ -0,0 +1,253 @@
+"""
+Device telemetry snapshots.
+
+A snapshot collects every supported health reading of a device in one locked
+session. Snapshots are cached for a short time so that several clients polling
+the same reader do not each cause USB traffic.
+
+The environment sampler polls temperature, humidity and uptime in the
+background into fixed-size ring buffers, so history and trends can be served
+without any device I/O.
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .backend import sdk
+from .devices import Capability, Device
+from .scheduler import FAST
+
+logger = logging.getLogger(__name__)
+
+# (field name, required capability, SDK getter, value converter)
+SNAPSHOT_FIELDS: List[Tuple[str, Capability, str, Callable[[Any], Any]]] = [
+    ("status", Capability.NONE, "get_device_status", str),
+    ("error", Capability.NONE, "get_device_error", str),
+    ("uptime_seconds", Capability.UPTIME, "get_device_uptime", lambda v: v),
+    ("slot_status", Capability.SLOT_STATUS, "get_device_slot_status", str),
+    ("parts_aligned", Capability.PARTS_ALIGNED, "get_device_parts_aligned", lambda v: v),
+    ("temperature_celsius", Capability.TEMPERATURE, "get_device_temperature", lambda v: v),
+    ("relative_humidity_percent", Capability.HUMIDITY, "get_device_humidity", lambda v: v),
+]
+
+
+def read_snapshot(device: Device) -> Dict[str, Any]:
+    """
+    Reads all supported telemetry fields of a device while holding its lock.
+    Each field carries its own timestamp; failed reads carry an error instead.
+    """
+    fields: Dict[str, Any] = {}
+    with device.lock.lane(FAST):
+        for name, capability, getter, convert in SNAPSHOT_FIELDS:
+            if capability and not device.supports(capability):
+                continue
+            result_code, value = device.call(getter)
+            if result_code != sdk.ErrorCode.NO_ERROR:
+                fields[name] = {"error": f"Error: {getter} failed: {result_code}", "timestamp": time.time()}
+            else:
+                fields[name] = {"value": convert(value), "timestamp": time.time()}
+    return {"serial": device.serial, "taken_at": time.time(), "fields": fields}
+
+
+class SnapshotCache:
+    """Per-device snapshot cache with a time-to-live."""
+
+    def __init__(self, ttl: float = 2.0):
+        self.ttl = ttl
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, device: Device, max_age: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Returns a snapshot no older than ``max_age`` seconds (default: the TTL),
+        reading the device only when the cached one is too old. While a
+        measurement holds the device, the last snapshot is returned regardless
+        of its age, flagged with 'device_busy'; without one, the snapshot has
+        no fields and is not waited for.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        snapshot = self._fresh(device.serial, max_age)
+        if snapshot is None and device.lock.busy_with_bulk():
+            snapshot = self._fresh(device.serial, float("inf"))
+            if snapshot is None:
+                return {
+                    "serial": device.serial,
+                    "taken_at": None,
+                    "fields": {},
+                    "cached": False,
+                    "device_busy": True,
+                    "age_seconds": None,
+                }
+            return {
+                **snapshot,
+                "cached": True,
+                "device_busy": True,
+                "age_seconds": time.time() - snapshot["taken_at"],
+            }
+        if snapshot is None:
+            with device.lock.lane(FAST):
+                # Another client may have refreshed it while we waited.
+                snapshot = self._fresh(device.serial, max_age)
+                if snapshot is None:
+                    snapshot = read_snapshot(device)
+                    with self._lock:
+                        self._entries[device.serial] = snapshot
+                    return {**snapshot, "cached": False, "age_seconds": 0.0}
+        return {**snapshot, "cached": True, "age_seconds": time.time() - snapshot["taken_at"]}
+
+    def invalidate(self, serial: str) -> None:
+        with self._lock:
+            self._entries.pop(serial, None)
+
+    def _fresh(self, serial: str, max_age: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            snapshot = self._entries.get(serial)
+        if snapshot is not None and time.time() - snapshot["taken_at"] <= max_age:
+            return snapshot
+        return None
+
+
+class RingBuffer:
+    """
+    Fixed-capacity time series backed by one ``array('d')`` per column.
+    Missing readings are stored as NaN. Memory use does not grow with uptime.
+    """
+
+    COLUMNS = ("timestamp", "temperature_celsius", "relative_humidity_percent", "uptime_seconds")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._columns = {name: array("d", [math.nan]) * capacity for name in self.COLUMNS}
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, temperature: float, humidity: float, uptime: float) -> None:
+        with self._lock:
+            for name, value in zip(self.COLUMNS, (timestamp, temperature, humidity, uptime)):
+                self._columns[name][self._next] = value
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+
+    def window(self, since: float = 0.0) -> Dict[str, array]:
+        """Returns the samples taken at or after ``since``, oldest first."""
+        with self._lock:
+            start = (self._next - self._size) % self.capacity
+            ordered = {}
+            for name, column in self._columns.items():
+                if start + self._size <= self.capacity:
+                    ordered[name] = column[start:start + self._size]
+                else:
+                    ordered[name] = column[start:] + column[:self._next]
+        first = bisect.bisect_left(ordered["timestamp"], since)
+        return {name: column[first:] for name, column in ordered.items()}
+
+
+def _aggregate(values: array) -> Dict[str, Any]:
+    present = [v for v in values if not math.isnan(v)]
+    if not present:
+        return {"count": 0, "min": None, "mean": None, "max": None}
+    return {
+        "count": len(present),
+        "min": min(present),
+        "mean": sum(present) / len(present),
+        "max": max(present),
+    }
+
+
+def _nan_to_none(values: array) -> List[Optional[float]]:
+    return [None if math.isnan(v) else v for v in values]
+
+
+class EnvironmentSampler:
+    """
+    Background thread that samples the environmental sensors of every
+    connected device at a fixed interval. An interval of 0 pauses sampling.
+    """
+
+    def __init__(self, devices: Callable[[], List[Device]], interval: float = 30.0, capacity: int = 8640):
+        self.interval = interval
+        self.capacity = capacity
+        self._devices = devices
+        self._buffers: Dict[str, RingBuffer] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name="byonoy-sampler", daemon=True)
+            self._thread.start()
+
+    def set_interval(self, interval: float) -> None:
+        self.interval = interval
+        self._wake.set()
+
+    def forget(self, serial: str) -> None:
+        with self._lock:
+            self._buffers.pop(serial, None)
+
+    def history(self, serial: str, window_seconds: Optional[float] = None, max_points: int = 500) -> Dict[str, Any]:
+        """
+        Returns the sampled series for a device, optionally limited to the last
+        ``window_seconds``, downsampled to at most ``max_points`` points, with
+        min/mean/max aggregates computed over the full window.
+        """
+        with self._lock:
+            buffer = self._buffers.get(serial)
+        since = 0.0 if window_seconds is None else time.time() - window_seconds
+        columns = buffer.window(since) if buffer is not None else {n: array("d") for n in RingBuffer.COLUMNS}
+        count = len(columns["timestamp"])
+        step = max(1, math.ceil(count / max_points)) if max_points > 0 else 1
+        return {
+            "serial": serial,
+            "interval_seconds": self.interval,
+            "samples": count,
+            "aggregates": {name: _aggregate(columns[name]) for name in RingBuffer.COLUMNS[1:]},
+            "series": {name: _nan_to_none(columns[name][::step]) for name in RingBuffer.COLUMNS},
+        }
+
+    def sample(self, device: Device) -> None:
+        """Takes one sample of a device and appends it to its buffer."""
+        readings = []
+        with device.lock.lane(FAST):
+            for capability, getter in (
+                (Capability.TEMPERATURE, "get_device_temperature"),
+                (Capability.HUMIDITY, "get_device_humidity"),
+                (Capability.UPTIME, "get_device_uptime"),
+            ):
+                value = math.nan
+                if device.supports(capability):
+                    result_code, reading = device.call(getter)
+                    if result_code == sdk.ErrorCode.NO_ERROR:
+                        value = float(reading)
+                readings.append(value)
+        with self._lock:
+            buffer = self._buffers.get(device.serial)
+            if buffer is None:
+                buffer = self._buffers[device.serial] = RingBuffer(self.capacity)
+        buffer.append(time.time(), *readings)
+
+    def _loop(self) -> None:
+        while True:
+            if self.interval > 0:
+                for device in self._devices():
+                    if not device.capabilities & (Capability.TEMPERATURE | Capability.HUMIDITY | Capability.UPTIME):
+                        continue
+                    # Do not hold up the other readers while one is measuring.
+                    if device.lock.busy_with_bulk():
+                        continue
+                    try:
+                        self.sample(device)
+                    except Exception:
+                        logger.exception("Environment sampling failed for %s", device.serial)
+            self._wake.wait(self.interval if self.interval > 0 else None)
+            self._wake.clear()
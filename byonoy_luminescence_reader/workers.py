@@ -0,0 +1,301 @@
+"""
+Process-per-reader workers.
+
+In the default ``thread`` mode every reader handle lives in the server
+process and SDK calls run on its threads. In ``process`` mode each reader
+gets a worker process that loads its own SDK backend and owns the handle.
+The server talks to it over a pipe:
+
+- requests are ``(command, payload)`` tuples: ``open``, ``call`` and ``close``;
+- SDK config objects are sent as plain tuples and rebuilt in the worker;
+- plate values (lists of at least 96 floats) are written into a shared-memory
+  float64 buffer and only their offset and length go through the pipe;
+- enums are sent by type and member name and mapped back to the server's
+  SDK, so result codes compare as usual.
+
+Readers then measure on separate cores, and a reader whose SDK call hangs is
+terminated after ``BYONOY_MCP_WORKER_TIMEOUT`` seconds without holding up
+the others. Calls on a dead or hung worker return
+``ConnectionFault.WORKER_FAILED``, so the connection supervisor restarts the
+worker like any lost handle.
+
+With the simulator backend every worker runs its own simulator instance, so
+``sdk.get()`` in the server does not control the workers' readers.
+"""
+
+import enum
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from array import array
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Optional, Tuple
+
+from .backend import sdk
+from .devices import Capability, ConnectionFault, Device, fault_result, open_device
+from .metrics import registry
+from .plate import WELLS
+
+logger = logging.getLogger(__name__)
+
+# Shared-memory floats per reader: enough for 64 plates in one result
+BUFFER_FLOATS = WELLS * 64
+
+# Seconds an SDK call may take before the worker is considered hung
+WORKER_TIMEOUT = float(os.environ.get("BYONOY_MCP_WORKER_TIMEOUT", "300"))
+
+# Seconds to wait for a worker to start and open its reader
+OPEN_TIMEOUT = 60.0
+
+
+class WorkerError(RuntimeError):
+    """The worker process failed, hung or exited."""
+
+
+def _encode_arg(value: Any) -> Any:
+    """Turns an SDK config object into a plain tuple the worker can rebuild."""
+    if hasattr(value, "selected_wells"):
+        return ("lum96_config", value.mode.name, list(value.selected_wells))
+    if hasattr(value, "sample_wavelengths"):
+        return ("abs96_multiple", list(value.sample_wavelengths))
+    if hasattr(value, "sample_wavelength"):
+        return ("abs96_single", value.sample_wavelength)
+    return ("value", value)
+
+
+def _decode_arg(arg: Tuple[Any, ...]) -> Any:
+    kind = arg[0]
+    if kind == "lum96_config":
+        config = sdk.Lum96MeasurementConfig()
+        config.mode = getattr(sdk.Lum96IntegrationMode, arg[1])
+        config.selected_wells = arg[2]
+        return config
+    if kind == "abs96_multiple":
+        config = sdk.Abs96MultipleMeasurementConfig()
+        config.sample_wavelengths = arg[1]
+        return config
+    if kind == "abs96_single":
+        config = sdk.Abs96SingleMeasurementConfig()
+        config.sample_wavelength = arg[1]
+        return config
+    return arg[1]
+
+
+class _Slab:
+    """Appends float lists to a shared-memory buffer, from offset 0."""
+
+    def __init__(self, shm: SharedMemory):
+        self.shm = shm
+        self.used = 0
+
+    def put(self, values: List[float]) -> Optional[int]:
+        if self.used + len(values) > BUFFER_FLOATS:
+            return None
+        view = self.shm.buf[: BUFFER_FLOATS * 8].cast("d")
+        try:
+            view[self.used : self.used + len(values)] = array("d", values)
+        finally:
+            view.release()
+        offset = self.used
+        self.used += len(values)
+        return offset
+
+
+def _encode_result(value: Any, slab: Optional[_Slab]) -> Any:
+    if isinstance(value, enum.Enum):
+        return ("enum", type(value).__name__, value.name)
+    if isinstance(value, tuple):
+        return ("tuple", [_encode_result(v, slab) for v in value])
+    if isinstance(value, list):
+        if slab is not None and len(value) >= WELLS and all(type(v) is float for v in value):
+            offset = slab.put(value)
+            if offset is not None:
+                return ("floats", offset, len(value))
+        return ("list", [_encode_result(v, slab) for v in value])
+    if isinstance(value, dict):
+        return ("dict", {k: _encode_result(v, slab) for k, v in value.items()})
+    return ("value", value)
+
+
+def _decode_result(value: Tuple[Any, ...], view: Optional[memoryview]) -> Any:
+    kind = value[0]
+    if kind == "enum":
+        enum_type = getattr(sdk, value[1], None)
+        return getattr(enum_type, value[2], value[2])
+    if kind == "tuple":
+        return tuple(_decode_result(v, view) for v in value[1])
+    if kind == "list":
+        return [_decode_result(v, view) for v in value[1]]
+    if kind == "dict":
+        return {k: _decode_result(v, view) for k, v in value[1].items()}
+    if kind == "floats":
+        return view[value[1] : value[1] + value[2]].tolist()
+    return value[1]
+
+
+def _worker_main(conn: Any, serial: str, backend: str, shm_name: str) -> None:
+    """Worker process: opens ``serial`` and serves SDK calls on its handle."""
+    sdk.use(backend)
+    shm = SharedMemory(name=shm_name)
+    device: Optional[Device] = None
+    try:
+        while True:
+            try:
+                command, payload = conn.recv()
+            except EOFError:
+                # The server went away.
+                break
+            slab = _Slab(shm)
+            try:
+                if command == "open":
+                    available = next((d for d in sdk.available_devices() if d.sn == serial), None)
+                    if available is None:
+                        reply: Any = (None, f"Device {serial} is no longer available.")
+                    else:
+                        known = None
+                        if payload is not None:
+                            known = (Capability(payload[0]), _decode_result(payload[1], None))
+                        device, error = open_device(available, known)
+                        opened = None
+                        if device is not None:
+                            opened = {"capabilities": int(device.capabilities), "info": device.info}
+                        reply = (opened, error)
+                elif command == "call":
+                    if device is None:
+                        raise WorkerError(f"Device {serial} is not open.")
+                    name, args = payload
+                    reply = getattr(sdk, name)(device.handle, *[_decode_arg(a) for a in args])
+                elif command == "close":
+                    if device is not None:
+                        device.close()
+                    conn.send(("ok", ("value", None)))
+                    break
+                else:
+                    raise WorkerError(f"Unknown worker command '{command}'.")
+                conn.send(("ok", _encode_result(reply, slab)))
+            except Exception as exc:
+                conn.send(("error", f"{type(exc).__name__}: {exc}"))
+    finally:
+        shm.close()
+
+
+class WorkerDevice(Device):
+    """
+    A device whose handle is owned by a worker process. ``handle`` is the
+    worker's process ID, or None once the worker is closed; SDK calls are forwarded through ``_invoke``, so lane
+    locking and result caching work as for in-process devices.
+    """
+
+    def start(self, backend: str) -> None:
+        self._backend = backend
+        context = multiprocessing.get_context("spawn")
+        self._shm = SharedMemory(create=True, size=BUFFER_FLOATS * 8)
+        self._conn, child = context.Pipe()
+        self._pipe_lock = threading.Lock()
+        self._process = context.Process(
+            target=_worker_main,
+            args=(child, self.serial, backend, self._shm.name),
+            name=f"byonoy-worker-{self.serial}",
+            daemon=True,
+        )
+        self._process.start()
+        child.close()
+        self.handle = self._process.pid
+
+    def request(self, command: str, payload: Any = None, timeout: float = WORKER_TIMEOUT) -> Any:
+        """Sends a command and waits for its reply. A hung worker is terminated."""
+        with self._pipe_lock:
+            if not self._process.is_alive():
+                raise WorkerError(f"Worker for {self.serial} has exited.")
+            try:
+                self._conn.send((command, payload))
+                if not self._conn.poll(timeout):
+                    self._process.kill()
+                    raise WorkerError(f"Worker for {self.serial} did not answer within {timeout:g} s.")
+                status, reply = self._conn.recv()
+            except (EOFError, OSError) as exc:
+                raise WorkerError(f"Worker for {self.serial} has exited.") from exc
+            if status == "error":
+                raise WorkerError(reply)
+            view = self._shm.buf[: BUFFER_FLOATS * 8].cast("d")
+            try:
+                return _decode_result(reply, view)
+            finally:
+                view.release()
+
+    def _invoke(self, name: str, *args: Any) -> Any:
+        if self.handle is None:
+            return fault_result(name, ConnectionFault.HANDLE_LOST)
+        histogram = registry.histogram("sdk", name)
+        start = time.perf_counter()
+        error = True
+        try:
+            try:
+                result = self.request("call", (name, [_encode_arg(a) for a in args]))
+            except WorkerError as exc:
+                # A dead or hung worker is a lost connection: the supervisor
+                # restarts it through reopen.
+                logger.warning("%s on %s failed: %s", name, self.serial, exc)
+                return fault_result(name, ConnectionFault.WORKER_FAILED)
+            error = sdk.is_error(result)
+            return result
+        finally:
+            histogram.record(time.perf_counter() - start, error)
+
+    def reopen(self, available: Any) -> Optional[str]:
+        """Restarts the worker and opens the reader again with the known capabilities."""
+        self.close()
+        self.start(self._backend)
+        try:
+            opened, error = self.request(
+                "open", (int(self.capabilities), _encode_result(self.info, None)), timeout=OPEN_TIMEOUT
+            )
+        except WorkerError as exc:
+            opened, error = None, str(exc)
+        if opened is None:
+            self.close()
+            return error
+        self.abs96_setup = None
+        return None
+
+    def close(self) -> None:
+        if self.handle is None:
+            return
+        try:
+            if self._process.is_alive():
+                self.request("close")
+        except WorkerError:
+            logger.warning("Worker for %s did not close cleanly", self.serial)
+        self._process.join(timeout=5)
+        if self._process.is_alive():
+            self._process.kill()
+        self._conn.close()
+        self._shm.close()
+        self._shm.unlink()
+        self.handle = None
+
+
+def open_worker_device(
+    serial: str, known: Optional[Tuple[Capability, Dict[str, Any]]] = None
+) -> Tuple[Optional[Device], Optional[str]]:
+    """
+    Starts a worker process for ``serial`` and opens the reader in it. Returns
+    the device or an error message, like ``devices.open_device``.
+    """
+    device = WorkerDevice(serial=serial, handle=None)
+    device.start(sdk.name)
+    payload = None
+    if known is not None:
+        payload = (int(known[0]), _encode_result(known[1], None))
+    try:
+        opened, error = device.request("open", payload, timeout=OPEN_TIMEOUT)
+    except WorkerError as exc:
+        opened, error = None, f"Failed to start worker for {serial}: {exc}"
+    if opened is None:
+        device.close()
+        return None, error
+    device.capabilities = Capability(opened["capabilities"])
+    device.info = opened["info"]
+    return device, None
@@ -15,7 +15,8 @@ if __name__ == "__main__":
         packages=find_packages(),
         install_requires=[
             "byonoy_devices",
-            "mcp[cli]>=1.0.0",
+            "mcp[cli]>=1.9.4",
+            "numpy>=1.22",
         ],
         extras_require={
             "dev": [
@@ -0,0 +1,13 @@
+"""
+Test setup: the server runs on the simulated backend, with fast simulated
+reads and without on-disk state or background sampling.
+"""
+
+import os
+
+os.environ.setdefault("BYONOY_MCP_BACKEND", "simulator")
+os.environ.setdefault("BYONOY_SIM_TIME_SCALE", "0.01")
+os.environ.setdefault("BYONOY_MCP_STORE_DIR", "")
+os.environ.setdefault("BYONOY_MCP_LAYOUTS_FILE", "")
+os.environ.setdefault("BYONOY_MCP_SAMPLE_INTERVAL", "0")
+os.environ.setdefault("BYONOY_MCP_INVENTORY_INTERVAL", "0")
@@ -0,0 +1,91 @@
+import math
+
+import numpy as np
+import pytest
+
+from byonoy_luminescence_reader import analysis
+
+POSITIVE = np.array([0, 1])
+NEGATIVE = np.array([2, 3])
+BLANK = np.array([4, 5])
+
+
+@pytest.fixture
+def plates():
+    """Two plates: the first with distinct controls, the second all zero."""
+    plates = np.zeros((2, 96))
+    plates[0, :7] = [100, 110, 10, 12, 2, 4, 58]
+    return plates
+
+
+def test_subtract_blank(plates):
+    blanked = analysis.subtract_blank(plates, BLANK)
+    assert blanked[0, :7].tolist() == [97, 107, 7, 9, -1, 1, 55]
+    assert blanked[0, 95] == -3
+    assert not blanked[1].any()
+
+
+def test_group_stats_use_the_sample_standard_deviation(plates):
+    mean, sd = analysis.group_stats(plates, POSITIVE)
+    assert mean[0] == 105
+    assert sd[0] == pytest.approx(math.sqrt(50))
+    assert analysis.cv_percent(mean, sd)[0] == pytest.approx(100 * math.sqrt(50) / 105)
+
+
+def test_z_prime_and_signal_to_background(plates):
+    blanked = analysis.subtract_blank(plates, BLANK)
+    positive_mean, positive_sd = analysis.group_stats(blanked, POSITIVE)
+    negative_mean, negative_sd = analysis.group_stats(blanked, NEGATIVE)
+    assert positive_mean[0] == 102 and negative_mean[0] == 8
+    z = analysis.z_prime(positive_mean, positive_sd, negative_mean, negative_sd)
+    assert z[0] == pytest.approx(1 - 3 * (math.sqrt(50) + math.sqrt(2)) / 94)
+    assert analysis.signal_to_background(positive_mean, negative_mean)[0] == pytest.approx(102 / 8)
+    assert analysis.at_least(z, 0.5).tolist() == [True, False]
+
+
+def test_percent_of_control(plates):
+    blanked = analysis.subtract_blank(plates, BLANK)
+    positive_mean, _ = analysis.group_stats(blanked, POSITIVE)
+    negative_mean, _ = analysis.group_stats(blanked, NEGATIVE)
+    activity = analysis.normalize(blanked, positive_mean, negative_mean)
+    assert activity[0, 0] == pytest.approx(100 * 89 / 94)
+    assert activity[0, 2] == pytest.approx(-100 / 94)
+    assert activity[0, 6] == pytest.approx(50)
+
+
+def test_undefined_values_are_nan_and_reported_as_none(plates):
+    mean, sd = analysis.group_stats(plates, POSITIVE)
+    # Zero span: the second plate has equal control means.
+    assert np.isnan(analysis.normalize(plates, mean, mean)[1]).all()
+    assert np.isnan(analysis.z_prime(mean, sd, mean, sd)[1])
+    # Zero mean.
+    assert np.isnan(analysis.cv_percent(mean, sd)[1])
+    assert np.isnan(analysis.signal_to_background(mean, mean)[1])
+    # A single well has no standard deviation.
+    mean, sd = analysis.group_stats(plates, np.array([6]))
+    assert mean.tolist() == [58, 0]
+    assert np.isnan(sd).all()
+    assert np.isnan(analysis.cv_percent(mean, sd)).all()
+
+    assert analysis.to_float(np.nan) is None
+    assert analysis.to_float(np.inf) is None
+    assert analysis.to_float(1 / 3) == 0.3333
+    assert analysis.summarize(np.array([np.nan, np.inf])) == {"mean": None, "median": None, "min": None, "max": None}
+    assert analysis.summarize(np.array([1.0, np.nan, 2.0, 6.0])) == {"mean": 3.0, "median": 2.0, "min": 1.0, "max": 6.0}
+
+
+def test_wells_and_other_wells():
+    selected = [False] * 96
+    selected[0] = selected[13] = selected[95] = True
+    indices = analysis.wells(selected)
+    assert indices.tolist() == [0, 13, 95]
+    assert analysis.well_names(indices) == ["A1", "B2", "H12"]
+    assert analysis.other_wells(np.arange(48), POSITIVE, NEGATIVE).tolist() == list(range(4, 48))
+
+
+def test_as_plates_stacks_lists_and_arrays():
+    stored = np.ones((2, 96))
+    plates = analysis.as_plates([[0.0] * 96], stored)
+    assert plates.shape == (3, 96)
+    assert plates[:, 0].tolist() == [0, 1, 1]
+    assert analysis.as_plates([], stored).shape == (2, 96)
@@ -0,0 +1,165 @@
+import threading
+import time
+
+import pytest
+
+from byonoy_luminescence_reader.jobs import (
+    JOB_CANCELLED,
+    JOB_DONE,
+    JOB_EXPIRED,
+    JOB_FAILED,
+    JobManager,
+    JobTableFull,
+    KeyConflict,
+)
+
+
+def wait(job, timeout=5.0):
+    job.future.result(timeout)
+    return job
+
+
+def blocker(jobs, serial="SIM00001"):
+    """Submits a job that holds the reader's worker until the returned event is set."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def run(job):
+        started.set()
+        release.wait(5)
+        return "blocker"
+
+    job = jobs.submit("block", serial, run, {})
+    assert started.wait(5)
+    return job, release
+
+
+def test_jobs_of_one_reader_run_in_order():
+    jobs = JobManager()
+    order = []
+    submitted = [jobs.submit("step", "SIM00001", lambda job, i=i: order.append(i), {}) for i in range(5)]
+    for job in submitted:
+        assert wait(job).status == JOB_DONE
+    assert order == list(range(5))
+
+
+def test_failure_is_recorded():
+    jobs = JobManager()
+
+    def run(job):
+        raise RuntimeError("plate jammed")
+
+    job = wait(jobs.submit("fail", "SIM00001", run, {}))
+    assert job.status == JOB_FAILED
+    assert job.error == "Error: plate jammed"
+
+
+def test_readers_run_in_parallel():
+    jobs = JobManager()
+    _, release = blocker(jobs, "SIM00001")
+    other = wait(jobs.submit("other", "SIM00002", lambda job: "done", {}))
+    assert other.status == JOB_DONE
+    release.set()
+
+
+def test_full_table_evicts_finished_jobs_and_refuses_pending_ones():
+    jobs = JobManager(max_jobs=2)
+    first = wait(jobs.submit("done", "SIM00001", lambda job: "ok", {}))
+    running, release = blocker(jobs)
+    queued = jobs.submit("queued", "SIM00001", lambda job: "ok", {})
+    assert jobs.get(first.id) is None
+    with pytest.raises(JobTableFull):
+        jobs.submit("refused", "SIM00001", lambda job: "ok", {})
+    release.set()
+    assert wait(queued).status == JOB_DONE
+    assert wait(running).status == JOB_DONE
+
+
+def test_deadline_drops_a_queued_job():
+    jobs = JobManager()
+    _, release = blocker(jobs)
+    ran = []
+    job = jobs.submit("late", "SIM00001", lambda job: ran.append(1), {}, deadline=time.time() + 0.05)
+    time.sleep(0.1)
+    assert jobs.get(job.id).status == JOB_EXPIRED
+    release.set()
+    wait(job)
+    assert job.status == JOB_EXPIRED
+    assert ran == []
+
+
+def test_deadline_stops_a_running_job_with_partial_result():
+    jobs = JobManager()
+
+    def run(job):
+        done = []
+        while True:
+            done.append(len(done))
+            job.sleep(0.01, partial=list(done))
+
+    job = wait(jobs.submit("loop", "SIM00001", run, {}, deadline=time.time() + 0.1))
+    assert job.status == JOB_EXPIRED
+    assert job.result
+
+
+def test_cancel_queued_and_running_jobs():
+    jobs = JobManager()
+    running, release = blocker(jobs)
+    queued = jobs.submit("queued", "SIM00001", lambda job: "ran", {})
+    assert jobs.cancel(queued)
+    assert queued.status == JOB_CANCELLED
+
+    def run(job):
+        job.sleep(5, partial="stopped early")
+
+    release.set()
+    wait(running)
+    job = jobs.submit("long", "SIM00001", run, {})
+    while job.started_at is None:
+        time.sleep(0.01)
+    started = time.monotonic()
+    assert jobs.cancel(job)
+    wait(job)
+    assert time.monotonic() - started < 1
+    assert job.status == JOB_CANCELLED
+    assert job.result == "stopped early"
+    assert not jobs.cancel(job)
+    assert wait(queued).result is None
+
+
+def test_submit_once_returns_the_same_job():
+    jobs = JobManager()
+    calls = []
+    job, submitted = jobs.submit_once("key-1", "measure", "SIM00001", lambda job: calls.append(1), {"mode": "FAST"})
+    again, resubmitted = jobs.submit_once("key-1", "measure", "SIM00001", lambda job: calls.append(1), {"mode": "FAST"})
+    assert submitted and not resubmitted
+    assert again is job
+    wait(job)
+    assert calls == [1]
+    assert jobs.find_key("key-1") is job
+    with pytest.raises(KeyConflict):
+        jobs.submit_once("key-1", "measure", "SIM00001", lambda job: None, {"mode": "SENSITIVE"})
+
+
+def test_submit_once_retries_failed_jobs():
+    jobs = JobManager()
+
+    def fail(job):
+        raise RuntimeError("no plate")
+
+    job, _ = jobs.submit_once("key-1", "measure", "SIM00001", fail, {})
+    wait(job)
+    retry, submitted = jobs.submit_once("key-1", "measure", "SIM00001", lambda job: "ok", {})
+    assert submitted
+    assert wait(retry).status == JOB_DONE
+
+
+def test_idempotency_keys_expire():
+    jobs = JobManager(key_ttl=0.05)
+    job, _ = jobs.submit_once("key-1", "measure", "SIM00001", lambda job: "ok", {})
+    wait(job)
+    assert jobs.find_key("key-1") is job
+    time.sleep(0.1)
+    assert jobs.find_key("key-1") is None
+    again, submitted = jobs.submit_once("key-1", "measure", "SIM00001", lambda job: "ok", {})
+    assert submitted and again is not job
@@ -0,0 +1,71 @@
+import base64
+import math
+
+import numpy as np
+import pytest
+
+from byonoy_luminescence_reader.plate import encode_series, encode_values, pack_wells, unpack_wells, well_name
+
+VALUES = [i + 0.5 for i in range(96)]
+
+
+def decode_float32(payload):
+    assert payload["encoding"] == "float32"
+    assert payload["byte_order"] == "little"
+    return np.frombuffer(base64.b64decode(payload["data"]), dtype="<f4")
+
+
+def test_well_names_and_masks():
+    assert [well_name(i) for i in (0, 11, 12, 13, 95)] == ["A1", "A12", "B1", "B2", "H12"]
+    selected = [i % 3 == 0 for i in range(96)]
+    assert len(pack_wells(selected)) == 12
+    assert unpack_wells(pack_wells(selected)) == selected
+    assert pack_wells([True] + [False] * 95).hex() == "80" + "00" * 11
+
+
+def test_list_is_unchanged():
+    assert encode_values(VALUES) is VALUES
+
+
+def test_float32_round_trips():
+    payload = encode_values(VALUES, "float32")
+    assert payload["count"] == 96
+    assert decode_float32(payload).tolist() == VALUES
+
+
+def test_matrix_has_rows_of_twelve():
+    values = VALUES[:]
+    values[13] = math.nan
+    matrix = encode_values(values, "matrix")
+    assert list(matrix) == list("ABCDEFGH")
+    assert all(len(row) == 12 for row in matrix.values())
+    assert matrix["A"][0] == 0.5
+    assert matrix["B"][1] is None
+    assert matrix["H"][11] == 95.5
+
+
+def test_sparse_respects_the_well_mask():
+    selected = [False] * 96
+    selected[0] = selected[13] = selected[95] = True
+    assert encode_values(VALUES, "sparse", selected) == {"A1": 0.5, "B2": 13.5, "H12": 95.5}
+    assert len(encode_values(VALUES, "sparse")) == 96
+
+
+def test_series():
+    rows = [VALUES, [v + 100 for v in VALUES]]
+    payload = encode_series(rows, "float32")
+    assert payload["shape"] == [2, 96]
+    assert payload["count"] == 192
+    assert decode_float32(payload).reshape(payload["shape"]).tolist() == rows
+
+    selected = [i < 12 for i in range(96)]
+    sparse = encode_series(rows, "sparse", selected)
+    assert [sorted(read, key=lambda name: int(name[1:])) for read in sparse] == [[f"A{c}" for c in range(1, 13)]] * 2
+    assert sparse[1]["A1"] == 100.5
+    assert [len(read) for read in encode_series(rows, "matrix")] == [8, 8]
+    assert encode_series(rows) == rows
+
+
+def test_unknown_encoding():
+    with pytest.raises(ValueError, match="Unknown encoding"):
+        encode_values(VALUES, "csv")
@@ -0,0 +1,38 @@
+import pytest
+
+from byonoy_luminescence_reader.protocol import MAX_STEPS, parse_protocol
+
+
+def test_defaults_are_filled_in():
+    steps = parse_protocol([{"step": "wait_for_plate"}, {"step": "measure", "selected_wells": "A1:H6"}], repeat=2)
+    assert [step.kind for step in steps] == ["wait_for_plate", "measure"]
+    assert steps[0].options == {"timeout_seconds": 600.0, "poll_seconds": 1.0}
+    assert steps[1].options["mode"] == "SENSITIVE"
+    assert steps[1].describe() == "step 2 (measure)"
+
+
+@pytest.mark.parametrize(
+    "steps, message",
+    [
+        ([], "at least one step"),
+        (["measure"], "must be an object"),
+        ([{"step": "shake"}], "unknown step 'shake'"),
+        ([{"step": "wait"}], "'seconds' is required"),
+        ([{"step": "wait", "seconds": -1}], "non-negative number"),
+        ([{"step": "wait", "seconds": True}], "non-negative number"),
+        ([{"step": "wait_for_plate", "poll_seconds": 0}], "must be positive"),
+        ([{"step": "measure", "speed": 1}], "unknown options speed"),
+        ([{"step": "measure", "mode": 5}], "'mode' must be a string"),
+        ([{"step": "measure", "selected_wells": 5}], "'selected_wells' must be"),
+    ],
+)
+def test_invalid_protocols(steps, message):
+    with pytest.raises(ValueError, match=message):
+        parse_protocol(steps)
+
+
+def test_repeat_limits():
+    with pytest.raises(ValueError, match="repeat"):
+        parse_protocol([{"step": "record_temperature"}], repeat=0)
+    with pytest.raises(ValueError, match=f"at most {MAX_STEPS}"):
+        parse_protocol([{"step": "record_temperature"}] * 2, repeat=MAX_STEPS)
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import pytest
+
+from byonoy_luminescence_reader.backend import sdk
+from byonoy_luminescence_reader.devices import open_device
+from byonoy_luminescence_reader.scheduler import BULK, FAST, LaneLock
+
+
+def hold(lock, lane):
+    """Takes ``lock`` in ``lane`` on another thread until the returned event is set."""
+    taken = threading.Event()
+    release = threading.Event()
+
+    def run():
+        with lock.lane(lane):
+            taken.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert taken.wait(5)
+    return release, thread
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_fast_lane_is_granted_before_waiting_bulk_commands():
+    lock = LaneLock("test-priority")
+    release, holder = hold(lock, BULK)
+    order = []
+
+    def waiter(lane):
+        with lock.lane(lane):
+            order.append(lane)
+
+    bulk = threading.Thread(target=waiter, args=(BULK,))
+    bulk.start()
+    wait_for(lambda: lock.state()["waiting"][BULK] == 1)
+    fast = threading.Thread(target=waiter, args=(FAST,))
+    fast.start()
+    wait_for(lambda: lock.state()["waiting"][FAST] == 1)
+
+    release.set()
+    for thread in (holder, bulk, fast):
+        thread.join(5)
+    assert order == [FAST, BULK]
+
+
+def test_lock_is_reentrant_and_owned():
+    lock = LaneLock("test-reentrant")
+    with lock.lane(BULK):
+        with lock.lane(FAST):
+            assert lock.held_by_me()
+        assert lock.state()["busy_lane"] == BULK
+        # Only other threads see the reader as busy.
+        assert not lock.busy_with_bulk()
+    assert lock.state()["busy_lane"] is None
+    with pytest.raises(RuntimeError):
+        lock.release()
+
+
+def test_acquire_times_out_while_held():
+    lock = LaneLock("test-timeout")
+    release, holder = hold(lock, BULK)
+    assert lock.busy_with_bulk()
+    assert not lock.acquire(FAST, timeout=0.05)
+    release.set()
+    holder.join(5)
+    assert lock.acquire(FAST, timeout=1)
+    lock.release()
+
+
+@pytest.fixture
+def device():
+    available = next(d for d in sdk.available_devices() if d.type == sdk.DeviceTypes.Luminescence96)
+    device, error = open_device(available)
+    assert error is None
+    yield device
+    with device.lock.lane(BULK):
+        device.close()
+
+
+def test_reads_do_not_wait_for_a_bulk_command(device):
+    release, holder = hold(device.lock, BULK)
+    started = time.monotonic()
+    assert device.read("get_device_status") == (None, None)
+    assert time.monotonic() - started < 0.5
+    release.set()
+    holder.join(5)
+
+    (result_code, status), age = device.read("get_device_status")
+    assert result_code == sdk.ErrorCode.NO_ERROR
+    assert age is None
+
+    release, holder = hold(device.lock, BULK)
+    (result_code, cached), age = device.read("get_device_status")
+    assert cached == status
+    assert age is not None and age >= 0
+    release.set()
+    holder.join(5)
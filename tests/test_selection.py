@@ -0,0 +1,76 @@
+import pytest
+
+from byonoy_luminescence_reader.selection import (
+    LayoutStore,
+    compile_mask,
+    compile_selection,
+    describe_selection,
+)
+
+
+def wells(expression, layouts=None):
+    return describe_selection(compile_selection(expression, layouts))["wells"]
+
+
+@pytest.mark.parametrize(
+    "expression, expected",
+    [
+        ("A1", ["A1"]),
+        ("a1:b2", ["A1", "A2", "B1", "B2"]),
+        ("B2:A1", ["A1", "A2", "B1", "B2"]),
+        ("A1, H12", ["A1", "H12"]),
+        ("col 12", [f"{row}12" for row in "ABCDEFGH"]),
+        ("rows B,D", [f"{row}{col}" for row in "BD" for col in range(1, 13)]),
+        ("row A except A2:A12", ["A1"]),
+        ("cols 1-2 + rows H except H1:H12", [f"{row}{col}" for row in "ABCDEFG" for col in (1, 2)]),
+        ("none", []),
+    ],
+)
+def test_expressions(expression, expected):
+    assert wells(expression) == expected
+
+
+def test_all_and_hex_masks_round_trip():
+    assert compile_selection("all") == [True] * 96
+    mask = describe_selection(compile_selection("A1:H6"))["well_mask"]
+    assert compile_selection(mask) == compile_selection("A1:H6")
+    assert compile_selection(f"0x{mask.lower()}") == compile_selection("A1:H6")
+    assert compile_mask("A1") == 1 << 95
+
+
+@pytest.mark.parametrize(
+    "expression, message",
+    [
+        ("I1", "not a well name"),
+        ("A13", "not a well name"),
+        ("rows Z", "not a row"),
+        ("cols 0", "not a column"),
+        ("cols 5-2", "reversed"),
+        ("rows", "Expected a list"),
+        ("A1 + ", "Empty term"),
+        ("@missing", "Unknown plate layout"),
+    ],
+)
+def test_invalid_expressions(expression, message):
+    with pytest.raises(ValueError, match=message):
+        compile_selection(expression)
+
+
+def test_layouts_can_be_referenced_and_changed(tmp_path):
+    layouts = LayoutStore(str(tmp_path / "layouts.json"))
+    layouts.save("Controls", "col 1")
+    assert wells("@controls", layouts.masks()) == [f"{row}1" for row in "ABCDEFGH"]
+    assert wells("A1:A2 except @controls", layouts.masks()) == ["A2"]
+
+    layouts.save("controls", "H12")
+    assert wells("@controls", layouts.masks()) == ["H12"]
+    assert LayoutStore(layouts.path).list()["controls"]["well_mask"] == f"{1:024X}"
+
+    assert layouts.delete("controls")
+    with pytest.raises(ValueError, match="Unknown plate layout"):
+        compile_selection("@controls", layouts.masks())
+
+
+def test_invalid_layout_name():
+    with pytest.raises(ValueError, match="Layout names"):
+        LayoutStore().save("no spaces", "A1")
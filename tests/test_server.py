@@ -0,0 +1,14 @@
+import anyio
+from mcp.shared.memory import create_connected_server_and_client_session
+
+from byonoy_luminescence_reader.server import mcp
+
+
+def test_advertises_resource_subscriptions():
+    async def initialize():
+        async with create_connected_server_and_client_session(mcp._mcp_server) as client:
+            return await client.initialize()
+
+    result = anyio.run(initialize)
+    assert result.capabilities.resources is not None
+    assert result.capabilities.resources.subscribe is True
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pytest
+
+from byonoy_luminescence_reader.store import RECORD_SIZE, VALUES_SIZE, MeasurementStore
+
+PARTIAL = [i < 48 for i in range(96)]
+
+
+def plate(offset):
+    return [float(offset + i) for i in range(96)]
+
+
+def fill(store):
+    store.append("SIM00001", "FAST", [True] * 96, plate(0), temperature=25.5, timestamp=100.0)
+    store.append("SIM00002", "SENSITIVE", PARTIAL, plate(1000), timestamp=200.0)
+    store.append("SIM00001", "FAST", [True] * 96, plate(2000), timestamp=300.0)
+
+
+def test_record_layout(tmp_path):
+    store = MeasurementStore(str(tmp_path))
+    fill(store)
+    assert RECORD_SIZE == 80
+    assert VALUES_SIZE == 96 * 4
+    assert os.path.getsize(tmp_path / "index.bin") == 3 * RECORD_SIZE
+    assert os.path.getsize(tmp_path / "values.f32") == 3 * VALUES_SIZE
+    assert np.fromfile(tmp_path / "values.f32", dtype="<f4")[VALUES_SIZE // 4] == 1000
+    assert store.get(1) == {
+        "record_id": 1,
+        "timestamp": 200.0,
+        "temperature_celsius": None,
+        "mode": "SENSITIVE",
+        "serial": "SIM00002",
+        "well_mask": "F" * 12 + "0" * 12,
+    }
+    assert store.get(0)["temperature_celsius"] == 25.5
+    assert store.get(3) is None
+
+
+def test_reopen_and_query(tmp_path):
+    fill(MeasurementStore(str(tmp_path)))
+    store = MeasurementStore(str(tmp_path))
+    assert len(store) == 3
+    assert [r["record_id"] for r in store.query()] == [2, 1, 0]
+    assert [r["record_id"] for r in store.query(serial="SIM00001")] == [2, 0]
+    assert [r["record_id"] for r in store.query(mode="sensitive")] == [1]
+    assert [r["record_id"] for r in store.query(start_time=150, end_time=300)] == [2, 1]
+    assert [r["record_id"] for r in store.query(limit=1)] == [2]
+    assert store.query() == [store.get(i) for i in (2, 1, 0)]
+
+    values = store.values([2, 0, 7])
+    assert sorted(values) == [0, 2]
+    matrix = store.value_matrix([2, 0])
+    assert matrix.dtype == np.float64
+    assert matrix.tolist() == [values[2], values[0]] == [plate(2000), plate(0)]
+    with pytest.raises(IndexError):
+        store.value_matrix([3])
+
+
+def test_torn_index_record_is_dropped(tmp_path):
+    fill(MeasurementStore(str(tmp_path)))
+    with open(tmp_path / "index.bin", "r+b") as f:
+        f.truncate(2 * RECORD_SIZE + RECORD_SIZE // 2)
+
+    store = MeasurementStore(str(tmp_path))
+    assert [r["record_id"] for r in store.query()] == [1, 0]
+    assert store.get(2) is None
+    assert store.value_matrix([0, 1]).tolist() == [plate(0), plate(1000)]
+
+    # Appending recovers first, so the new plate takes the torn plate's place.
+    assert store.append("SIM00003", "FAST", [True] * 96, plate(3000), timestamp=400.0) == 2
+    assert os.path.getsize(tmp_path / "index.bin") == 3 * RECORD_SIZE
+    assert os.path.getsize(tmp_path / "values.f32") == 3 * VALUES_SIZE
+    assert store.get(2)["serial"] == "SIM00003"
+    assert store.values([2])[2] == store.value_matrix([2])[0].tolist() == plate(3000)
+
+
+def test_torn_values_are_dropped(tmp_path):
+    store = MeasurementStore(str(tmp_path))
+    fill(store)
+    # An append interrupted after half of its values and before its index record.
+    with open(tmp_path / "values.f32", "ab") as f:
+        f.write(b"\xff" * (VALUES_SIZE // 2))
+
+    store = MeasurementStore(str(tmp_path))
+    store.open()
+    assert os.path.getsize(tmp_path / "values.f32") == 3 * VALUES_SIZE
+    assert store.value_matrix([0, 1, 2]).tolist() == [plate(0), plate(1000), plate(2000)]
+
+
+def test_opening_does_not_touch_the_disk_until_used(tmp_path):
+    path = tmp_path / "store"
+    store = MeasurementStore(str(path))
+    assert not path.exists()
+    assert len(store) == 0
+    assert store.query() == []
+    assert store.values([0]) == {}
+    store.open()
+    assert path.is_dir()